@@ -1,3 +1,134 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from botocore.response import StreamingBody
+from unittest.mock import patch
+import io
+
+from objects.models import AppObject
+
+from .throttling import CacheBucketStore, LocalBucketStore, get_store
+
+User = get_user_model()
+
+
+class BucketStoreTests(TestCase):
+
+    def test_local_bucket(self):
+        store = LocalBucketStore()
+        with patch('api.throttling.time.monotonic', return_value=100.0) as clock:
+            self.assertEqual([store.consume('key', 1, 2, 3) for _ in range(4)], [0, 0, 0, 0.5])
+            clock.return_value = 100.5
+            self.assertEqual(store.consume('key', 1, 2, 3), 0)
+            # Larger than the burst: allowed when full, then the bucket is in debt
+            clock.return_value = 200.0
+            self.assertEqual(store.consume('key', 7, 2, 3), 0)
+            self.assertEqual(store.consume('key', 1, 2, 3), 2.5)
+
+    def test_local_bucket_is_bounded(self):
+        store = LocalBucketStore(max_buckets=2)
+        for key in ('a', 'b', 'c'):
+            store.consume(key, 1, 1, 1)
+        self.assertEqual(list(store.buckets), ['b', 'c'])
+
+    def test_cache_bucket(self):
+        cache.clear()
+        store = CacheBucketStore()
+        with patch('api.throttling.time.time', return_value=100.0):
+            self.assertEqual([store.consume('key', 1, 1, 2) for _ in range(3)], [0, 0, 1])
+            self.assertEqual(LocalBucketStore().consume('key', 1, 1, 2), 0)
+
+
+@override_settings(API_THROTTLE_BACKEND='api.throttling.LocalBucketStore')
+class ThrottlingTests(TestCase):
+
+    def setUp(self):
+        get_store().reset()
+        # A stopped clock keeps the buckets from refilling however slowly
+        # the requests run
+        clock = patch('api.throttling.time.monotonic', return_value=100.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+
+    @override_settings(API_THROTTLE_RATES={'people': (0.5, 2)})
+    def test_requests_per_user_and_scope(self):
+        url = reverse('people-shared')
+        self.client.force_authenticate(user=self.user)
+        for _ in range(2):
+            self.client.get(url, {'object_key': 'missing'})
+        response = self.client.get(url, {'object_key': 'missing'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '2')
+
+        # Other endpoint classes and other users have buckets of their own
+        response = self.client.get(reverse('list-objects'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(url, {'object_key': 'missing'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(API_THROTTLE_RATES={'login': (1, 1)})
+    def test_anonymous_requests_are_limited_per_address(self):
+        url = reverse('token_obtain_pair')
+        self.client.post(url, {'username': 'testuser', 'password': 'wrong'})
+        response = self.client.post(url, {'username': 'testuser', 'password': 'testpass'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post(url, {'username': 'testuser', 'password': 'testpass'},
+                                    REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(API_THROTTLE_RATES={'login': (1, 1)})
+    def test_forwarded_for_does_not_split_buckets(self):
+        url = reverse('token_obtain_pair')
+        statuses = [self.client.post(url, {'username': 'testuser', 'password': 'wrong'},
+                                     HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+                    for i in range(3)]
+        self.assertEqual(statuses, [status.HTTP_400_BAD_REQUEST] + [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+
+    @override_settings(API_THROTTLE_RATES={'login': (1, 1)},
+                       REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_forwarded_for_behind_a_proxy(self):
+        url = reverse('token_obtain_pair')
+        # The proxy appends the client address, so the last entry is trusted
+        statuses = [self.client.post(url, {'username': 'testuser', 'password': 'wrong'},
+                                     HTTP_X_FORWARDED_FOR=f'198.51.100.7, 203.0.113.{i}').status_code
+                    for i in (1, 2, 2)]
+        self.assertEqual(statuses, [status.HTTP_400_BAD_REQUEST] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    @override_settings(API_THROTTLE_BYTE_RATES={'download': (100, 100)}, OBJECT_DOWNLOAD_MODE='stream')
+    @patch('objects.views.get_s3_client')
+    def test_download_bytes(self, mock_get_s3_client):
+        AppObject.objects.create(object_key='test-key', name='testfile.txt', owner=self.user, size=1000,
+                                 mime_type='text/plain', file_type='others')
+        mock_get_s3_client.return_value.get_object.side_effect = lambda **kwargs: {
+            'Body': StreamingBody(io.BytesIO(b'x' * 1000), 1000), 'ContentLength': 1000}
+        self.client.force_authenticate(user=self.user)
+        url = reverse('download-object')
+
+        response = self.client.get(url, {'object_key': 'test-key'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The 1000 bytes sent put the 100 B/s bucket 900 bytes in debt,
+        # which the next request has to wait out
+        response = self.client.get(url, {'object_key': 'test-key'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '9')
+
+    @override_settings(API_THROTTLE_BACKEND='api.throttling.CacheBucketStore',
+                       API_THROTTLE_RATES={'people': (1, 1)})
+    def test_cache_backend(self):
+        cache.clear()
+        url = reverse('people-shared')
+        self.client.force_authenticate(user=self.user)
+        with patch('api.throttling.time.time', return_value=100.0):
+            self.client.get(url, {'object_key': 'missing'})
+            response = self.client.get(url, {'object_key': 'missing'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from rest_framework.throttling import BaseThrottle
+
+
+def refill(tokens, updated, now, rate, capacity):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def take(tokens, cost, rate, capacity, force):
+    """
+    Returns the balance after paying ``cost`` and how long to wait first.
+
+    A cost above the capacity is let through once the bucket is full, and
+    the balance goes negative; ``force`` charges even when it must wait.
+    """
+    needed = min(cost, capacity)
+    if tokens >= needed or force:
+        return tokens - cost, 0
+    return tokens, (needed - tokens) / rate
+
+
+class LocalBucketStore:
+    """
+    Buckets in this process, for single-node deployments. The least
+    recently used buckets are dropped beyond ``max_buckets``; a dropped
+    bucket comes back full.
+    """
+
+    def __init__(self, max_buckets=None):
+        self.max_buckets = max_buckets or settings.API_THROTTLE_LOCAL_MAX_BUCKETS
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, cost, rate, capacity, force=False):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens, wait = take(refill(tokens, updated, now, rate, capacity), cost, rate, capacity, force)
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default Django cache, shared by every process using it.
+    The read and the write are not atomic, so concurrent requests of one
+    client can overdraw a bucket by a few tokens.
+    """
+
+    def consume(self, key, cost, rate, capacity, force=False):
+        now = time.time()
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens, wait = take(refill(tokens, updated, now, rate, capacity), cost, rate, capacity, force)
+        # A bucket left alone until it is full again is the same as none
+        cache.set(key, (tokens, now), timeout=int((capacity - tokens) / rate) + 1)
+        return wait
+
+
+_store = None
+_store_path = None
+
+
+def get_store():
+    """Returns the bucket store configured in ``API_THROTTLE_BACKEND``."""
+    global _store, _store_path
+    if _store_path != settings.API_THROTTLE_BACKEND:
+        _store = import_string(settings.API_THROTTLE_BACKEND)()
+        _store_path = settings.API_THROTTLE_BACKEND
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Limits each user, or each client address for anonymous requests, per
+    endpoint class. Views name their class in ``throttle_scope``; the
+    limits are ``(rate per second, burst)`` pairs in ``rates_setting``, and
+    scopes without one are not limited.
+    """
+    rates_setting = 'API_THROTTLE_RATES'
+    kind = 'requests'
+    default_scope = 'api'
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', self.default_scope)
+
+    def get_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'addr:{self.get_ident(request)}'
+        return f'throttle:{self.kind}:{scope}:{ident}'
+
+    def get_cost(self, request):
+        return 1
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        self.limit = getattr(settings, self.rates_setting).get(scope)
+        if self.limit is None:
+            return True
+        self.key = self.get_key(request, scope)
+        self.wait_time = get_store().consume(self.key, self.get_cost(request), *self.limit)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class ByteRateThrottle(TokenBucketThrottle):
+    """
+    Limits the bytes sent and received per second. Request bodies are paid
+    for up front; response bodies are charged by ``ByteThrottleMiddleware``
+    once their length is known, so a large download delays the next
+    request instead.
+    """
+    rates_setting = 'API_THROTTLE_BYTE_RATES'
+    kind = 'bytes'
+
+    def get_cost(self, request):
+        try:
+            return max(int(request.META.get('CONTENT_LENGTH') or 0), 0)
+        except ValueError:
+            return 0
+
+    def allow_request(self, request, view):
+        allowed = super().allow_request(request, view)
+        if allowed and self.limit is not None:
+            request._request.throttle_byte_charges = (self.key, *self.limit)
+        return allowed
+
+
+class ByteThrottleMiddleware:
+    """Charges response bodies to the byte bucket the request was checked against."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        charges = getattr(request, 'throttle_byte_charges', None)
+        if charges is not None and response.has_header('Content-Length'):
+            key, rate, capacity = charges
+            get_store().consume(key, int(response['Content-Length']), rate, capacity, force=True)
+        return response
@@ -0,0 +1,53 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AppObjectShare
+
+
+def _generation_key(app_object_id):
+    return f'object-access:{app_object_id}'
+
+
+def _generation(app_object_id):
+    key = _generation_key(app_object_id)
+    generation = cache.get(key)
+    if generation is None:
+        # A fresh random generation never matches decisions cached under
+        # one that was dropped, evicted or expired
+        cache.add(key, uuid4().hex[:12], settings.OBJECT_ACCESS_CACHE_TTL)
+        generation = cache.get(key)
+    return generation
+
+
+def can_read(user, app_object):
+    """
+    Whether ``user`` may read ``app_object``, i.e. owns it or has it shared
+    with them.
+
+    Sharing is checked with one EXISTS on the share table's unique index and
+    each decision is cached under its own key. The keys embed a generation
+    per object, so dropping that one key forgets every decision about the
+    object however many readers it has.
+    """
+    if app_object.owner_id == user.id:
+        return True
+
+    key = f'{_generation_key(app_object.pk)}:{_generation(app_object.pk)}:{user.id}'
+    decision = cache.get(key)
+    if decision is None:
+        decision = AppObjectShare.objects.filter(
+            app_object_id=app_object.pk, user_id=user.id).exists()
+        cache.set(key, decision, settings.OBJECT_ACCESS_CACHE_TTL)
+    return decision
+
+
+def forget(app_object_ids):
+    """Drops the cached decisions about the given objects."""
+    keys = [_generation_key(app_object_id) for app_object_id in app_object_ids]
+    if keys:
+        cache.delete_many(keys)
+        # A check made before the change commits could cache the old shares
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -2,3 +2,5 @@ from django.contrib import admin
 from . import models
 
 admin.site.register(models.AppObject)
+admin.site.register(models.StorageUsage)
+admin.site.register(models.Rendition)
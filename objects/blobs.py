@@ -0,0 +1,92 @@
+import hashlib
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Blob
+from .storage import delete_keys
+
+
+def hash_file(file):
+    """Returns the hex SHA-256 of ``file`` and rewinds it."""
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def find_blob(sha256):
+    return Blob.objects.filter(sha256=sha256).first()
+
+
+def _add_references(counts, sign):
+    # One UPDATE per distinct count rather than one per blob
+    by_count = defaultdict(list)
+    for blob_id, count in counts.items():
+        by_count[count].append(blob_id)
+    for count, blob_ids in by_count.items():
+        Blob.objects.filter(pk__in=blob_ids).update(ref_count=F('ref_count') + sign * count)
+
+
+def acquire_blobs(uploads):
+    """
+    Takes one blob reference per ``(sha256, size, storage_key)`` upload.
+
+    ``storage_key`` is where the upload's bytes were written, or ``None`` when
+    they were not written because the content was already known. Returns the
+    referenced blobs by hash and the storage keys that turned out to be
+    duplicates and should be deleted from S3. A hash missing from the result
+    had no bytes written and its blob was purged in the meantime.
+    """
+    uploads = list(uploads)
+    stored = {}
+    for sha256, size, storage_key in uploads:
+        if storage_key is not None:
+            stored.setdefault(sha256, Blob(sha256=sha256, size=size, storage_key=storage_key))
+
+    with transaction.atomic():
+        # Concurrent uploads of the same new content race here; the losers'
+        # bytes are discarded below.
+        Blob.objects.bulk_create(stored.values(), ignore_conflicts=True)
+        blobs = {blob.sha256: blob for blob in Blob.objects.select_for_update().filter(
+            sha256__in={sha256 for sha256, _, _ in uploads})}
+        _add_references(Counter(blobs[sha256].pk for sha256, _, _ in uploads
+                                if sha256 in blobs), 1)
+
+    duplicate_keys = [storage_key for sha256, _, storage_key in uploads
+                      if storage_key is not None and blobs.get(sha256) is not None
+                      and blobs[sha256].storage_key != storage_key]
+    return blobs, duplicate_keys
+
+
+def release_blobs(blob_ids):
+    """Drops one reference per id in ``blob_ids``; ``None`` entries are ignored."""
+    counts = Counter(blob_id for blob_id in blob_ids if blob_id is not None)
+    if counts:
+        _add_references(counts, -1)
+    return list(counts)
+
+
+def purge_blobs(s3_client, blob_ids=None):
+    """
+    Deletes unreferenced blobs and their S3 objects, optionally only among
+    ``blob_ids``. Returns the number of blobs purged.
+
+    The rows stay locked while S3 is called, so an upload of the same content
+    either revives a blob before it is purged or creates a new one after.
+    Blobs whose S3 object could not be deleted are left for the next run.
+    """
+    with transaction.atomic():
+        blobs = Blob.objects.select_for_update().filter(ref_count=0)
+        if blob_ids is not None:
+            blobs = blobs.filter(pk__in=blob_ids)
+        storage_keys = dict(blobs.values_list('storage_key', 'pk'))
+        if not storage_keys:
+            return 0
+        errors = delete_keys(s3_client, storage_keys)
+        purged = [blob_id for storage_key, blob_id in storage_keys.items()
+                  if storage_key not in errors]
+        Blob.objects.filter(pk__in=purged).delete()
+    return len(purged)
@@ -0,0 +1,79 @@
+import statistics
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from objects.models import AppObject, AppObjectShare
+from objects.views import ObjectListView
+from objectstorage.benchmarks import create_users, rolled_back
+
+
+class Command(BaseCommand):
+    help = ("Measures ObjectListView latency for users with a growing number of "
+            "visible objects. Fixture rows are created inside a transaction that "
+            "is rolled back afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1000, 10000, 100000, 1000000],
+                            help="Visible objects per user to measure at.")
+        parser.add_argument('--shared-ratio', type=float, default=0.25,
+                            help="Fraction of the objects that are shared with the user.")
+        parser.add_argument('--page-size', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'objects':>10} {'first page':>12} {'deep page':>12} {'no count':>12}")
+        for size in options['sizes']:
+            # Unthrottled, so the numbers do not depend on API_THROTTLE_RATES
+            with rolled_back(ALLOWED_HOSTS=['testserver'],
+                             API_THROTTLE_RATES={}, API_THROTTLE_BYTE_RATES={}):
+                first, deep, no_count = self.measure(size, options)
+            self.stdout.write(f"{size:>10} {first:>10.2f}ms {deep:>10.2f}ms {no_count:>10.2f}ms")
+
+    def measure(self, size, options):
+        user, other = next(create_users(f'bench{uuid4().hex[:8]}-', 2))
+
+        shared_count = int(size * options['shared_ratio'])
+        batch = []
+        for i in range(size):
+            batch.append(AppObject(object_key=str(uuid4()), name=f'file{i}.txt',
+                                   owner=other if i < shared_count else user,
+                                   size=i, mime_type='text/plain', file_type='others'))
+            if len(batch) == 5000 or i == size - 1:
+                created = AppObject.objects.bulk_create(batch)
+                AppObjectShare.objects.bulk_create(
+                    AppObjectShare(app_object=obj, user=user, **AppObjectShare.copies(obj))
+                    for obj in created if obj.owner_id == other.id)
+                batch = []
+
+        page_size = options['page_size']
+        view = ObjectListView.as_view()
+        factory = APIRequestFactory()
+
+        def timed(path):
+            samples = []
+            for _ in range(options['repeat']):
+                request = factory.get(path)
+                force_authenticate(request, user=user)
+                start = time.perf_counter()
+                response = view(request)
+                response.render()
+                samples.append((time.perf_counter() - start) * 1000)
+            return statistics.median(samples)
+
+        # A cursor halfway through the listing stands in for a deep page
+        path = f'/api/objects/list/?page_size={page_size}'
+        middle = AppObject.objects.filter(owner=user).order_by(
+            '-uploaded_at', '-object_key')[(size - shared_count) // 2]
+        pagination = ObjectListView.pagination_class()
+        pagination.base_url = path
+
+        return (
+            timed(path),
+            timed(pagination.encode_cursor(middle, reverse=False)),
+            timed(f'{path}&count=false'),
+        )
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from objects.models import AppObject, MultipartUpload
+from objects.quotas import release
+from objects.storage import delete_keys, get_s3_client
+
+
+class Command(BaseCommand):
+    help = "Deletes direct-to-S3 uploads that were started but never completed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl', type=int, default=settings.OBJECT_PENDING_UPLOAD_TTL,
+            help="Age in seconds after which a pending upload is expired.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['ttl'])
+        expired = AppObject.objects.filter(
+            status=AppObject.Status.PENDING, uploaded_at__lt=cutoff)
+        usages = {object_key: (owner_id, file_type, size) for object_key, owner_id, file_type, size in
+                  expired.values_list('object_key', 'owner_id', 'file_type', 'size')}
+        if not usages:
+            self.stdout.write("No expired uploads.")
+            return
+
+        upload_ids = dict(MultipartUpload.objects.filter(
+            app_object_id__in=usages).values_list('app_object_id', 'upload_id'))
+
+        # Claim the rows before touching S3: an upload completed since the
+        # scan is no longer pending, survives the delete and keeps its bytes.
+        with transaction.atomic():
+            expired.filter(object_key__in=usages).delete()
+            completed = set(AppObject.objects.filter(
+                object_key__in=usages).values_list('object_key', flat=True))
+            object_keys = [object_key for object_key in usages if object_key not in completed]
+            release(usages[object_key] for object_key in object_keys)
+
+        # The client may have uploaded some or all of the bytes without
+        # calling the completion endpoint, so remove whatever reached S3.
+        s3_client = get_s3_client()
+        for object_key in object_keys:
+            if object_key not in upload_ids:
+                continue
+            try:
+                s3_client.abort_multipart_upload(
+                    Bucket=settings.ARVAN_BUCKET_NAME, Key=object_key, UploadId=upload_ids[object_key])
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'NoSuchUpload':
+                    self.stderr.write(f"Could not abort the upload of {object_key}: {e}")
+
+        # The rows are gone, so keys that fail here are only reported
+        for object_key, code in delete_keys(s3_client, object_keys).items():
+            self.stderr.write(f"Could not delete {object_key}: {code}")
+        self.stdout.write(f"Expired {len(object_keys)} pending uploads.")
@@ -0,0 +1,39 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from objects import thumbnails
+from objects.renditions import process_renditions
+
+
+class Command(BaseCommand):
+    help = "Renders queued previews of images and PDFs in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OBJECT_RENDITION_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=settings.OBJECT_RENDITION_WORKERS)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling for new renditions instead of exiting.")
+        parser.add_argument('--interval', type=float, default=settings.OBJECT_RENDITION_POLL_INTERVAL,
+                            help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        if not thumbnails.can_render('image'):
+            raise CommandError("Pillow is required to render previews.")
+        if not thumbnails.can_render('pdf'):
+            self.stderr.write("PyMuPDF is not installed; PDF previews will fail.")
+
+        # Spawned workers start without the database connections and S3
+        # sockets of this process; they only import the rendering module.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as executor:
+            while True:
+                rendered = process_renditions(executor, options['batch_size'], options['workers'] * 2)
+                if rendered:
+                    self.stdout.write(f"Rendered {rendered} previews.")
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from objects.blobs import purge_blobs
+from objects.storage import get_s3_client
+
+
+class Command(BaseCommand):
+    help = ("Deletes stored content that no object references any more, e.g. "
+            "when the S3 delete failed at the time its last object was removed.")
+
+    def handle(self, *args, **options):
+        purged = purge_blobs(get_s3_client())
+        self.stdout.write(f"Purged {purged} unreferenced blobs.")
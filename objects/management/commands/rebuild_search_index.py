@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from objects.models import AppObject, SearchToken
+from objects.search import index_objects
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the name search index of every available object."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        available = AppObject.objects.filter(status=AppObject.Status.AVAILABLE).only(
+            'object_key', 'name', 'owner_id', 'uploaded_at', 'status')
+        with transaction.atomic():
+            SearchToken.objects.all().delete()
+            batch = []
+            for app_object in available.iterator(chunk_size=options['batch_size']):
+                batch.append(app_object)
+                if len(batch) == options['batch_size']:
+                    index_objects(batch)
+                    batch = []
+            index_objects(batch)
+        self.stdout.write(f"Indexed {SearchToken.objects.count()} name tokens.")
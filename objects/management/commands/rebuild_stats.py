@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from objects.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = ("Recomputes the storage statistics rollups from the objects table, "
+            "e.g. after they drifted or when they are first introduced.")
+
+    def handle(self, *args, **options):
+        type_rows, daily_rows = rebuild()
+        self.stdout.write(f"Rebuilt {type_rows} type and {daily_rows} daily statistics rows.")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from objects.quotas import reconcile
+
+
+class Command(BaseCommand):
+    help = ("Recomputes every user's storage usage from their objects, correcting "
+            "any drift in the incrementally maintained counters.")
+
+    def handle(self, *args, **options):
+        drifted = reconcile()
+        self.stdout.write(f"Corrected the storage usage of {drifted} users.")
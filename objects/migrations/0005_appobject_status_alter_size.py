@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0004_appobject_file_type_appobject_mime_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appobject',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('available', 'Available')], default='available', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='appobject',
+            name='size',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['uploaded_at'], name='appobject_pending_idx'),
+        ),
+    ]
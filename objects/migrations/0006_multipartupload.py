@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0005_appobject_status_alter_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MultipartUpload',
+            fields=[
+                ('app_object', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='multipart_upload', serialize=False, to='objects.appobject')),
+                ('upload_id', models.CharField(max_length=255)),
+                ('part_size', models.BigIntegerField()),
+                ('part_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MultipartUploadPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_number', models.PositiveIntegerField()),
+                ('etag', models.CharField(max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='objects.multipartupload')),
+            ],
+            options={
+                'ordering': ['part_number'],
+                'constraints': [models.UniqueConstraint(fields=('upload', 'part_number'), name='unique_upload_part')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_object_uploaded_at(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    AppObjectShare = apps.get_model('objects', 'AppObjectShare')
+    AppObjectShare.objects.update(object_uploaded_at=Subquery(
+        AppObject.objects.filter(pk=OuterRef('app_object_id')).values('uploaded_at')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0006_multipartupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The implicit shared_with table becomes an explicit through model
+        # without touching the database.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AppObjectShare',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('app_object', models.ForeignKey(db_column='appobject_id', on_delete=django.db.models.deletion.CASCADE, related_name='shares', to='objects.appobject')),
+                        ('user', models.ForeignKey(db_column='appuser_id', on_delete=django.db.models.deletion.CASCADE, related_name='object_shares', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'objects_appobject_shared_with',
+                        'unique_together': {('app_object', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='appobject',
+                    name='shared_with',
+                    field=models.ManyToManyField(related_name='shared_objects', through='objects.AppObjectShare', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='appobjectshare',
+            name='object_uploaded_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_object_uploaded_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', '-object_uploaded_at', '-app_object'], name='share_user_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', '-uploaded_at', '-object_key'], name='appobject_owner_uploaded_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+FILE_TYPES = ('image', 'video', 'music', 'pdf', 'others')
+
+
+def fill_storage_usage(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    StorageUsage = apps.get_model('objects', 'StorageUsage')
+    usages = {}
+    totals = AppObject.objects.filter(owner__isnull=False).values(
+        'owner_id', 'file_type').annotate(size=Sum('size'), count=Count('pk'))
+    for row in totals:
+        usage = usages.setdefault(row['owner_id'], StorageUsage(user_id=row['owner_id']))
+        file_type = row['file_type'] if row['file_type'] in FILE_TYPES else 'others'
+        column = f'{file_type}_bytes'
+        setattr(usage, column, getattr(usage, column) + row['size'])
+        usage.bytes_used += row['size']
+        usage.object_count += row['count']
+    StorageUsage.objects.bulk_create(usages.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0008_blob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='storage_usage', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('quota_bytes', models.BigIntegerField(blank=True, null=True)),
+                ('bytes_used', models.BigIntegerField(default=0)),
+                ('object_count', models.BigIntegerField(default=0)),
+                ('image_bytes', models.BigIntegerField(default=0)),
+                ('video_bytes', models.BigIntegerField(default=0)),
+                ('music_bytes', models.BigIntegerField(default=0)),
+                ('pdf_bytes', models.BigIntegerField(default=0)),
+                ('others_bytes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_storage_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_stats(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    TypeStat = apps.get_model('objects', 'TypeStat')
+    DailyUploadStat = apps.get_model('objects', 'DailyUploadStat')
+    available = AppObject.objects.filter(status='available')
+
+    type_stats = {}
+    for row in available.values('owner_id', 'file_type', 'mime_type').annotate(
+            count=Count('pk'), bytes=Sum('size')):
+        for user_id in {row['owner_id'], None}:
+            stat = type_stats.setdefault((user_id, row['file_type'], row['mime_type']), TypeStat(
+                user_id=user_id, file_type=row['file_type'], mime_type=row['mime_type']))
+            stat.count += row['count']
+            stat.bytes += row['bytes']
+    TypeStat.objects.bulk_create(type_stats.values(), batch_size=1000)
+
+    daily_stats = {}
+    for row in available.annotate(day=TruncDate('uploaded_at')).values('owner_id', 'day').annotate(
+            count=Count('pk'), bytes=Sum('size')):
+        for user_id in {row['owner_id'], None}:
+            stat = daily_stats.setdefault((user_id, row['day']), DailyUploadStat(
+                user_id=user_id, day=row['day']))
+            stat.count += row['count']
+            stat.bytes += row['bytes']
+    DailyUploadStat.objects.bulk_create(daily_stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0009_storageusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUploadStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('bytes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TypeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_type', models.CharField(max_length=20)),
+                ('mime_type', models.CharField(max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+                ('bytes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', '-size'], name='appobject_owner_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['-size'], name='appobject_size_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyuploadstat',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_upload_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='typestat',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='type_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyuploadstat',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'day'), name='unique_user_daily_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyuploadstat',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('day',), name='unique_system_daily_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='typestat',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'file_type', 'mime_type'), name='unique_user_type_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='typestat',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('file_type', 'mime_type'), name='unique_system_type_stat'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:05
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fill_search_tokens(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    AppObjectShare = apps.get_model('objects', 'AppObjectShare')
+    SearchToken = apps.get_model('objects', 'SearchToken')
+
+    user_ids = {}
+    for object_key, owner_id in AppObject.objects.filter(status='available').values_list('object_key', 'owner_id'):
+        user_ids[object_key] = {owner_id} - {None}
+    for object_key, user_id in AppObjectShare.objects.filter(
+            app_object__status='available').values_list('app_object_id', 'user_id'):
+        user_ids[object_key].add(user_id)
+
+    tokens = []
+    for app_object in AppObject.objects.filter(status='available').only('object_key', 'name', 'uploaded_at'):
+        for token in {token[:100] for token in TOKEN_RE.findall(app_object.name.casefold())}:
+            tokens.extend(SearchToken(user_id=user_id, token=token, app_object_id=app_object.pk,
+                                      object_uploaded_at=app_object.uploaded_at)
+                          for user_id in user_ids[app_object.pk])
+    SearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0010_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('object_uploaded_at', models.DateTimeField()),
+                ('app_object', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='objects.appobject')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'token', 'app_object'), name='unique_search_token')],
+                'indexes': [models.Index(fields=['app_object', 'user', 'token'], name='search_token_object_idx')],
+            },
+        ),
+        migrations.RunPython(fill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_share_copies(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    AppObjectShare = apps.get_model('objects', 'AppObjectShare')
+    app_object = AppObject.objects.filter(pk=OuterRef('app_object_id'))
+    AppObjectShare.objects.update(
+        object_name=Subquery(app_object.values('name')[:1]),
+        object_size=Subquery(app_object.values('size')[:1]),
+        object_file_type=Subquery(app_object.values('file_type')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0011_searchtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appobject',
+            name='appobject_owner_size_idx',
+        ),
+        migrations.AddField(
+            model_name='appobjectshare',
+            name='object_file_type',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='appobjectshare',
+            name='object_name',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='appobjectshare',
+            name='object_size',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(fill_share_copies, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', 'name', 'object_key'], name='appobject_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', 'size', 'object_key'], name='appobject_owner_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', 'file_type', '-uploaded_at', '-object_key'], name='appobject_owner_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', 'file_type', 'name', 'object_key'], name='appobject_owner_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobject',
+            index=models.Index(fields=['owner', 'file_type', 'size', 'object_key'], name='appobject_owner_type_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', 'object_name', 'app_object'], name='share_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', 'object_size', 'app_object'], name='share_user_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', 'object_file_type', '-object_uploaded_at', '-app_object'], name='share_user_type_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', 'object_file_type', 'object_name', 'app_object'], name='share_user_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appobjectshare',
+            index=models.Index(fields=['user', 'object_file_type', 'object_size', 'app_object'], name='share_user_type_size_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def queue_renditions(apps, schema_editor):
+    AppObject = apps.get_model('objects', 'AppObject')
+    Rendition = apps.get_model('objects', 'Rendition')
+    object_keys = AppObject.objects.filter(
+        status='available', file_type__in=['image', 'pdf']).values_list('pk', flat=True)
+    Rendition.objects.bulk_create(
+        (Rendition(app_object_id=object_key, size=size)
+         for object_key in object_keys.iterator() for size in settings.OBJECT_RENDITION_SIZES),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objects', '0012_list_filters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('storage_key', models.CharField(blank=True, max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=50)),
+                ('bytes', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('app_object', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='objects.appobject')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='rendition_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('app_object', 'size'), name='unique_rendition')],
+            },
+        ),
+        migrations.RunPython(queue_renditions, migrations.RunPython.noop),
+    ]
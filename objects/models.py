@@ -1,20 +1,271 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
 
+class Blob(models.Model):
+    """
+    One stored copy of some content. Objects with identical bytes share a
+    blob; its S3 object is removed once ``ref_count`` drops to zero.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    storage_key = models.CharField(max_length=36, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Lets the purge command find unreferenced blobs directly
+            models.Index(fields=['ref_count'], name='blob_unreferenced_idx',
+                         condition=models.Q(ref_count=0)),
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
 class AppObject(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        AVAILABLE = 'available', 'Available'
+
     object_key = models.CharField(
         max_length=36, primary_key=True, blank=False, null=False)
     name = models.CharField(max_length=100)
     owner = models.ForeignKey(
         User, related_name='owned_objects', on_delete=models.SET_NULL, null=True)
-    size = models.IntegerField()
-    shared_with = models.ManyToManyField(User, related_name='shared_objects')
+    size = models.BigIntegerField()
+    shared_with = models.ManyToManyField(
+        User, related_name='shared_objects', through='AppObjectShare')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     mime_type = models.CharField(max_length=50)
     file_type = models.CharField(max_length=20)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.AVAILABLE)
+    # Objects stored before deduplication, and direct-to-S3 uploads, have no
+    # blob and keep their bytes under object_key.
+    blob = models.ForeignKey(
+        Blob, related_name='app_objects', on_delete=models.PROTECT, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keeps the sweeper's scan for abandoned uploads small
+            models.Index(fields=['uploaded_at'], name='appobject_pending_idx',
+                         condition=models.Q(status='pending')),
+            # Newest-first listing of a user's own objects
+            models.Index(fields=['owner', '-uploaded_at', '-object_key'],
+                         name='appobject_owner_uploaded_idx'),
+            # The other orderings and the file type filter of the object
+            # list; the size one also finds a user's largest objects
+            models.Index(fields=['owner', 'name', 'object_key'], name='appobject_owner_name_idx'),
+            models.Index(fields=['owner', 'size', 'object_key'], name='appobject_owner_size_idx'),
+            models.Index(fields=['owner', 'file_type', '-uploaded_at', '-object_key'],
+                         name='appobject_owner_type_idx'),
+            models.Index(fields=['owner', 'file_type', 'name', 'object_key'],
+                         name='appobject_owner_type_name_idx'),
+            models.Index(fields=['owner', 'file_type', 'size', 'object_key'],
+                         name='appobject_owner_type_size_idx'),
+            # Largest objects system-wide
+            models.Index(fields=['-size'], name='appobject_size_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    @property
+    def storage_key(self):
+        return self.blob.storage_key if self.blob_id else self.object_key
+
+
+class AppObjectShare(models.Model):
+    # Copies of these object columns let a user's shared objects be filtered
+    # and listed in any supported order from this table's indexes, without
+    # sorting the join.
+    COPIED_FIELDS = {
+        'uploaded_at': 'object_uploaded_at',
+        'name': 'object_name',
+        'size': 'object_size',
+        'file_type': 'object_file_type',
+    }
+
+    # Keeps the table and columns of the implicit through model it replaced
+    app_object = models.ForeignKey(
+        AppObject, related_name='shares', on_delete=models.CASCADE, db_column='appobject_id')
+    user = models.ForeignKey(
+        User, related_name='object_shares', on_delete=models.CASCADE, db_column='appuser_id')
+    object_uploaded_at = models.DateTimeField(null=True)
+    object_name = models.CharField(max_length=100, null=True)
+    object_size = models.BigIntegerField(null=True)
+    object_file_type = models.CharField(max_length=20, null=True)
+
+    class Meta:
+        db_table = 'objects_appobject_shared_with'
+        unique_together = [('app_object', 'user')]
+        indexes = [
+            models.Index(fields=['user', '-object_uploaded_at', '-app_object'],
+                         name='share_user_uploaded_idx'),
+            models.Index(fields=['user', 'object_name', 'app_object'],
+                         name='share_user_name_idx'),
+            models.Index(fields=['user', 'object_size', 'app_object'],
+                         name='share_user_size_idx'),
+            models.Index(fields=['user', 'object_file_type', '-object_uploaded_at', '-app_object'],
+                         name='share_user_type_uploaded_idx'),
+            models.Index(fields=['user', 'object_file_type', 'object_name', 'app_object'],
+                         name='share_user_type_name_idx'),
+            models.Index(fields=['user', 'object_file_type', 'object_size', 'app_object'],
+                         name='share_user_type_size_idx'),
+        ]
+
+    @classmethod
+    def copies(cls, app_object):
+        """Returns the copied columns of ``app_object`` as field values."""
+        return {copy: getattr(app_object, field) for field, copy in cls.COPIED_FIELDS.items()}
+
+
+class MultipartUpload(models.Model):
+    app_object = models.OneToOneField(
+        AppObject, related_name='multipart_upload', on_delete=models.CASCADE, primary_key=True)
+    upload_id = models.CharField(max_length=255)
+    part_size = models.BigIntegerField()
+    part_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.app_object} ({self.upload_id})'
+
+
+class MultipartUploadPart(models.Model):
+    upload = models.ForeignKey(
+        MultipartUpload, related_name='parts', on_delete=models.CASCADE)
+    part_number = models.PositiveIntegerField()
+    etag = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+
+    class Meta:
+        ordering = ['part_number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['upload', 'part_number'], name='unique_upload_part'),
+        ]
+
+
+class StorageUsage(models.Model):
+    """
+    Running totals of what a user stores. Every create and delete adjusts
+    them with F() updates, so a quota check reads one row instead of summing
+    over the user's objects. Pending uploads count at their declared size.
+    """
+    FILE_TYPES = ('image', 'video', 'music', 'pdf', 'others')
+
+    user = models.OneToOneField(
+        User, related_name='storage_usage', on_delete=models.CASCADE, primary_key=True)
+    # None means the OBJECT_STORAGE_QUOTA default applies
+    quota_bytes = models.BigIntegerField(null=True, blank=True)
+    bytes_used = models.BigIntegerField(default=0)
+    object_count = models.BigIntegerField(default=0)
+    image_bytes = models.BigIntegerField(default=0)
+    video_bytes = models.BigIntegerField(default=0)
+    music_bytes = models.BigIntegerField(default=0)
+    pdf_bytes = models.BigIntegerField(default=0)
+    others_bytes = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user} ({self.bytes_used} bytes)'
+
+
+class TypeStat(models.Model):
+    """
+    Bytes and object count per (file_type, mime_type) of a user's available
+    objects, or of everyone's when ``user`` is null. Kept up to date on
+    upload and delete; ``rebuild_stats`` recomputes it from scratch.
+    """
+    user = models.ForeignKey(User, related_name='type_stats', on_delete=models.CASCADE, null=True)
+    file_type = models.CharField(max_length=20)
+    mime_type = models.CharField(max_length=50)
+    count = models.BigIntegerField(default=0)
+    bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'file_type', 'mime_type'],
+                                    condition=models.Q(user__isnull=False), name='unique_user_type_stat'),
+            models.UniqueConstraint(fields=['file_type', 'mime_type'],
+                                    condition=models.Q(user__isnull=True), name='unique_system_type_stat'),
+        ]
+
+
+class DailyUploadStat(models.Model):
+    """Uploads completed per day by a user, or by everyone when ``user`` is null."""
+    user = models.ForeignKey(User, related_name='daily_upload_stats', on_delete=models.CASCADE, null=True)
+    day = models.DateField()
+    count = models.BigIntegerField(default=0)
+    bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'],
+                                    condition=models.Q(user__isnull=False), name='unique_user_daily_stat'),
+            models.UniqueConstraint(fields=['day'],
+                                    condition=models.Q(user__isnull=True), name='unique_system_daily_stat'),
+        ]
+
+
+class SearchToken(models.Model):
+    """
+    One word of an available object's name, stored once for its owner and
+    once per user it is shared with, so a user's name search is a range scan
+    over their own rows of the unique index.
+    """
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE, db_index=False)
+    token = models.CharField(max_length=100)
+    app_object = models.ForeignKey(
+        AppObject, related_name='search_tokens', on_delete=models.CASCADE, db_index=False)
+    # Copy of app_object.uploaded_at, so matches are ordered without a join
+    object_uploaded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'token', 'app_object'], name='unique_search_token'),
+        ]
+        indexes = [
+            # Checks the further words of a query against one candidate, and
+            # finds an object's rows when it is deleted or unshared
+            models.Index(fields=['app_object', 'user', 'token'], name='search_token_object_idx'),
+        ]
+
+
+class Rendition(models.Model):
+    """
+    A preview of an image, or of a PDF's first page, scaled down to fit a
+    ``size`` x ``size`` box. Pending rows are the queue of the
+    process_renditions worker.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
+    app_object = models.ForeignKey(
+        AppObject, related_name='renditions', on_delete=models.CASCADE, db_index=False)
+    size = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING)
+    storage_key = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=50, blank=True)
+    bytes = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['app_object', 'size'], name='unique_rendition'),
+        ]
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='rendition_pending_idx',
+                         condition=models.Q(status='pending')),
+        ]
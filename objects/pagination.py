@@ -0,0 +1,144 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound, ValidationError as APIValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on ``(ordering_field, pk)``.
+
+    Each page is fetched with a ``WHERE (field, pk) < (value, key)`` seek
+    instead of an OFFSET, so deep pages cost the same as the first one. The
+    cursor is opaque to clients: it encodes the boundary row, direction and
+    ordering.
+
+    Clients pick the ordering among ``ordering_fields`` with the
+    ``ordering`` parameter, ``-`` prefixed for descending order.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    ordering_fields = ('uploaded_at', 'name', 'size')
+    ordering = '-uploaded_at'
+    ordering_field = 'uploaded_at'
+    descending = True
+    invalid_cursor_message = 'Invalid cursor.'
+    invalid_ordering_message = 'Invalid ordering.'
+
+    def get_page_size(self, request):
+        page_size = settings.OBJECT_LIST_PAGE_SIZE
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        return max(1, min(page_size, settings.OBJECT_LIST_MAX_PAGE_SIZE))
+
+    def get_include_count(self, request):
+        include_count = request.query_params.get(self.count_query_param)
+        if include_count is None:
+            return settings.OBJECT_LIST_INCLUDE_COUNT
+        return include_count.lower() not in ('0', 'false', 'no')
+
+    def get_ordering_param(self, request):
+        ordering = request.query_params.get(self.ordering_query_param) or self.ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise APIValidationError({'error': self.invalid_ordering_message})
+        return ordering
+
+    def encode_cursor(self, obj, reverse):
+        field = obj._meta.get_field(self.ordering_field)
+        position = {'v': field.value_to_string(obj), 'k': str(obj.pk), 'r': reverse,
+                    'o': self.ordering}
+        cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            # A cursor only makes sense in the ordering it was made in
+            if position['o'] != self.ordering:
+                raise ValueError(position['o'])
+            field = model._meta.get_field(self.ordering_field)
+            value = field.to_python(position['v'])
+            return value, position['k'], bool(position['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def seek(self, queryset, value, key, forward, field=None, key_field='pk'):
+        """Restricts ``queryset`` to the rows past ``(value, key)``."""
+        field = field or self.ordering_field
+        after = forward == self.descending
+        lookup = 'lt' if after else 'gt'
+        return queryset.filter(
+            Q(**{f'{field}__{lookup}': value}) |
+            Q(**{field: value, f'{key_field}__{lookup}': key}))
+
+    def get_ordering(self, forward, field=None, key_field='pk'):
+        fields = [field or self.ordering_field, key_field]
+        if self.descending == forward:
+            return [f'-{name}' for name in fields]
+        return fields
+
+    def fetch(self, queryset, position, forward, limit):
+        """Returns up to ``limit`` rows past ``position`` in fetch order."""
+        if position is not None:
+            queryset = self.seek(queryset, position[0], position[1], forward)
+        return list(queryset.order_by(*self.get_ordering(forward))[:limit])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.cursor_query_param)
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering_param(request)
+        self.ordering_field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        position = self.decode_cursor(request, queryset.model)
+        reverse = position is not None and position[2]
+
+        self.count = queryset.count() if self.get_include_count(request) else None
+
+        # One extra row tells whether another page exists in that direction
+        results = self.fetch(queryset, position, not reverse, page_size + 1)
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.next = self.previous = None
+        if results:
+            if has_more or reverse:
+                self.next = self.encode_cursor(results[-1], reverse=False)
+            if position is not None and (has_more or not reverse):
+                self.previous = self.encode_cursor(results[0], reverse=True)
+        return results
+
+    def get_paginated_response(self, data):
+        response = {'next': self.next, 'previous': self.previous, 'results': data}
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+
+class VisibleObjectsPagination(KeysetPagination):
+    """Keyset pagination over the owned and shared branches of ``VisibleObjects``."""
+
+    def fetch(self, visible_objects, position, forward, limit):
+        return visible_objects.fetch(self, position, forward, limit)
+
+
+class SearchPagination(VisibleObjectsPagination):
+    """The search index only keeps objects in upload order."""
+    ordering_fields = ('uploaded_at',)
@@ -0,0 +1,76 @@
+import heapq
+
+from .models import AppObject, AppObjectShare
+
+
+def shared_field(field):
+    """
+    Returns the share table lookup for an object field. Share rows carry
+    their own copy of some columns, so the shared branch can filter, seek
+    and sort on the share table's indexes.
+    """
+    name, _, lookup = field.partition('__')
+    copy = AppObjectShare.COPIED_FIELDS.get(name, f'app_object__{name}')
+    return f'{copy}__{lookup}' if lookup else copy
+
+
+class VisibleObjects:
+    """
+    Available objects a user owns or that are shared with them.
+
+    OR-ing the owner filter with a join on the share table forces the
+    database to de-duplicate every visible object before it can sort. Here
+    each side is read on its own, newest-first straight off an index, and the
+    two sorted streams are merged.
+
+    ``filters`` are lookups on ``AppObject`` applied to both sides.
+    """
+    model = AppObject
+
+    def __init__(self, user, filters=None):
+        self.user = user
+        self.filters = filters or {}
+
+    def owned(self):
+        return AppObject.objects.filter(
+            owner=self.user, status=AppObject.Status.AVAILABLE, **self.filters)
+
+    def shared(self):
+        return AppObjectShare.objects.filter(
+            user=self.user, app_object__status=AppObject.Status.AVAILABLE,
+            **{shared_field(lookup): value for lookup, value in self.filters.items()})
+
+    def count(self):
+        return self.owned().values('pk').union(
+            self.shared().values('app_object_id')).count()
+
+    def fetch(self, pagination, position, forward, limit):
+        """Returns up to ``limit`` objects past ``position`` in fetch order."""
+        field = pagination.ordering_field
+        shared_ordering_field = shared_field(field)
+
+        owned = self.owned()
+        shared = self.shared().select_related('app_object')
+        if position is not None:
+            value, key = position[:2]
+            owned = pagination.seek(owned, value, key, forward)
+            shared = pagination.seek(shared, value, key, forward,
+                                     field=shared_ordering_field, key_field='app_object_id')
+        owned = owned.order_by(*pagination.get_ordering(forward))[:limit]
+        shared = shared.order_by(*pagination.get_ordering(
+            forward, field=shared_ordering_field, key_field='app_object_id'))[:limit]
+
+        # Both branches come back in fetch order; an object shared with its
+        # own owner shows up in both and is kept once.
+        merged = heapq.merge(owned, (share.app_object for share in shared),
+                             key=lambda obj: (getattr(obj, field), obj.pk),
+                             reverse=pagination.descending == forward)
+        results, seen = [], set()
+        for obj in merged:
+            if obj.pk in seen:
+                continue
+            seen.add(obj.pk)
+            results.append(obj)
+            if len(results) == limit:
+                break
+        return results
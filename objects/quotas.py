@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import AppObject, StorageUsage
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def usage_column(file_type):
+    if file_type in StorageUsage.FILE_TYPES:
+        return f'{file_type}_bytes'
+    return 'others_bytes'
+
+
+def usage_changes(items, sign=1, count=True):
+    """
+    Returns ``update()`` arguments that add (or with ``sign=-1`` remove) the
+    ``(file_type, size)`` pairs in ``items``.
+    """
+    sizes = Counter()
+    objects = 0
+    for file_type, size in items:
+        sizes[usage_column(file_type)] += size
+        objects += 1
+    changes = {column: F(column) + sign * size for column, size in sizes.items()}
+    changes['bytes_used'] = F('bytes_used') + sign * sum(sizes.values())
+    if count:
+        changes['object_count'] = F('object_count') + sign * objects
+    return changes
+
+
+def remaining_quota(user_id):
+    """Returns how many more bytes a user may store."""
+    usage = StorageUsage.objects.filter(pk=user_id).values_list('bytes_used', 'quota_bytes').first()
+    bytes_used, quota_bytes = usage or (0, None)
+    if quota_bytes is None:
+        quota_bytes = settings.OBJECT_STORAGE_QUOTA
+    return max(quota_bytes - bytes_used, 0)
+
+
+def reserve(user_id, items):
+    """
+    Adds the ``(file_type, size)`` pairs in ``items`` to the usage of a user,
+    or raises ``QuotaExceeded`` if they do not fit in the user's quota.
+
+    The check and the increment are one conditional UPDATE of a single row,
+    so concurrent uploads cannot overshoot the quota together.
+    """
+    items = list(items)
+    total = sum(size for _, size in items)
+    within_quota = (Q(quota_bytes__isnull=True, bytes_used__lte=settings.OBJECT_STORAGE_QUOTA - total) |
+                    Q(quota_bytes__isnull=False, bytes_used__lte=F('quota_bytes') - total))
+    usage = StorageUsage.objects.filter(within_quota, pk=user_id)
+    if usage.update(**usage_changes(items)):
+        return
+
+    # The row is created on a user's first upload
+    StorageUsage.objects.bulk_create([StorageUsage(user_id=user_id)], ignore_conflicts=True)
+    if not usage.update(**usage_changes(items)):
+        raise QuotaExceeded()
+
+
+def resize(user_id, file_type, delta):
+    """Corrects the usage of an object whose final size differs from the reserved one."""
+    if delta:
+        StorageUsage.objects.filter(pk=user_id).update(
+            **usage_changes([(file_type, delta)], count=False))
+
+
+def release(rows):
+    """Removes deleted objects, given as ``(owner_id, file_type, size)`` rows."""
+    by_owner = defaultdict(list)
+    for owner_id, file_type, size in rows:
+        if owner_id is not None:
+            by_owner[owner_id].append((file_type, size))
+    for owner_id, items in by_owner.items():
+        StorageUsage.objects.filter(pk=owner_id).update(**usage_changes(items, sign=-1))
+
+
+def reconcile():
+    """
+    Recomputes every user's usage from their objects and returns the number
+    of rows that had drifted. Usage rows are locked meanwhile, so uploads
+    and deletes wait instead of being lost.
+    """
+    with transaction.atomic():
+        current = {usage.pk: usage for usage in StorageUsage.objects.select_for_update()}
+
+        expected = defaultdict(lambda: StorageUsage())
+        totals = AppObject.objects.filter(owner__isnull=False).values(
+            'owner_id', 'file_type').annotate(size=Sum('size'), count=Count('pk'))
+        for row in totals:
+            usage = expected[row['owner_id']]
+            usage.user_id = row['owner_id']
+            column = usage_column(row['file_type'])
+            setattr(usage, column, getattr(usage, column) + row['size'])
+            usage.bytes_used += row['size']
+            usage.object_count += row['count']
+
+        fields = ['bytes_used', 'object_count', *(usage_column(t) for t in StorageUsage.FILE_TYPES)]
+        drifted = []
+        for user_id in current.keys() | expected.keys():
+            usage = expected[user_id]
+            usage.user_id = user_id
+            old = current.get(user_id)
+            if old is None or any(getattr(old, field) != getattr(usage, field) for field in fields):
+                drifted.append(usage)
+
+        # Quotas are left as they are
+        StorageUsage.objects.bulk_create(
+            drifted, update_conflicts=True, unique_fields=['user'], update_fields=fields)
+    return len(drifted)
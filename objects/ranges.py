@@ -0,0 +1,115 @@
+import re
+from uuid import uuid4
+
+from django.utils.http import parse_http_date_safe
+
+RANGE_HEADER_RE = re.compile(r'^\s*bytes\s*=\s*(.+)$', re.IGNORECASE)
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+# More ranges than this in one request is more likely abuse than a media
+# player seeking, so such requests get the whole object instead.
+MAX_RANGES = 16
+
+
+def parse_range_header(header, size):
+    """
+    Parses a ``Range`` header against an object of ``size`` bytes.
+
+    Returns ``None`` when the header is absent or malformed (the whole object
+    should be served), an empty list when no range is satisfiable, and
+    otherwise the sorted, merged list of inclusive ``(start, end)`` pairs.
+    """
+    if not header:
+        return None
+    match = RANGE_HEADER_RE.match(header)
+    if not match:
+        return None
+
+    ranges = []
+    for spec in match.group(1).split(','):
+        spec_match = RANGE_SPEC_RE.match(spec)
+        if not spec_match:
+            return None
+        first, last = spec_match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # Suffix range: the final N bytes
+            if int(last) == 0:
+                continue
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+            end = min(end, size - 1)
+
+        if start < size:
+            ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_passes(header, etag, last_modified):
+    """Tests an ``If-Range`` header; a failed test means the Range is ignored."""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"'):
+        # If-Range requires a strong comparison
+        return header == etag
+    if_range_date = parse_http_date_safe(header)
+    return if_range_date is not None and if_range_date == last_modified
+
+
+class MultipartByteranges:
+    """
+    Builds a ``multipart/byteranges`` body for several ranges of one object.
+
+    ``open_range(start, end)`` must return an iterable of bytes for the
+    inclusive range; it is only called once the previous part is consumed,
+    so at most one upstream body is open at a time.
+    """
+
+    def __init__(self, ranges, size, content_type, open_range):
+        self.ranges = ranges
+        self.size = size
+        self.content_type = content_type
+        self.open_range = open_range
+        self.boundary = uuid4().hex
+
+    @property
+    def response_content_type(self):
+        return f'multipart/byteranges; boundary={self.boundary}'
+
+    def part_header(self, start, end):
+        return (
+            f'\r\n--{self.boundary}\r\n'
+            f'Content-Type: {self.content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{self.size}\r\n\r\n'
+        ).encode()
+
+    def closing(self):
+        return f'\r\n--{self.boundary}--\r\n'.encode()
+
+    def __len__(self):
+        return sum(len(self.part_header(start, end)) + end - start + 1
+                   for start, end in self.ranges) + len(self.closing())
+
+    def __iter__(self):
+        for start, end in self.ranges:
+            yield self.part_header(start, end)
+            yield from self.open_range(start, end)
+        yield self.closing()
@@ -0,0 +1,83 @@
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .access import forget
+from .models import AppObject, AppObjectShare, SearchToken
+from .renditions import queue_renditions
+from .search import index_objects, index_shares, unindex_shares
+
+
+@receiver(m2m_changed, sender=AppObjectShare)
+def fill_share_copies(sender, instance, action, reverse, pk_set, **kwargs):
+    # shared_with.add()/set() insert through rows without the denormalized
+    # object columns, so copy them over in a single UPDATE.
+    if action != 'post_add' or not pk_set:
+        return
+
+    if reverse:
+        shares = AppObjectShare.objects.filter(user=instance, app_object_id__in=pk_set)
+    else:
+        shares = AppObjectShare.objects.filter(app_object=instance, user_id__in=pk_set)
+
+    app_object = AppObject.objects.filter(pk=OuterRef('app_object_id'))
+    shares.filter(object_uploaded_at__isnull=True).update(**{
+        copy: Subquery(app_object.values(field)[:1])
+        for field, copy in AppObjectShare.COPIED_FIELDS.items()})
+
+
+@receiver(post_save, sender=AppObject)
+def update_share_copies(sender, instance, created, update_fields, **kwargs):
+    # Completing an upload sets its final size and upload time
+    if created:
+        return
+    if update_fields is None or set(update_fields) & AppObjectShare.COPIED_FIELDS.keys():
+        instance.shares.update(**AppObjectShare.copies(instance))
+
+
+@receiver(post_save, sender=AppObject)
+def index_object_name(sender, instance, created, update_fields, **kwargs):
+    # Objects become searchable and get previews once they are available;
+    # bulk_create paths call index_objects and queue_renditions themselves.
+    if created or update_fields is None or 'status' in update_fields:
+        index_objects([instance])
+        queue_renditions([instance])
+
+
+@receiver(m2m_changed, sender=AppObjectShare)
+def index_shared_names(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if action == 'post_clear':
+        # Only the owner's rows survive
+        if reverse:
+            SearchToken.objects.filter(user=instance).exclude(app_object__owner=instance).delete()
+        else:
+            SearchToken.objects.filter(app_object=instance).exclude(user_id=instance.owner_id).delete()
+    elif action == 'post_remove':
+        if reverse:
+            unindex_shares(pk_set, [instance.pk])
+        else:
+            unindex_shares([instance.pk], pk_set)
+    elif reverse:
+        index_shares((app_object, instance.pk) for app_object in AppObject.objects.filter(pk__in=pk_set))
+    else:
+        index_shares((instance, user_id) for user_id in pk_set)
+
+
+@receiver(m2m_changed, sender=AppObjectShare)
+def forget_access(sender, instance, action, reverse, pk_set, **kwargs):
+    # Bulk paths on the share table call forget themselves
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        forget(pk_set)
+    elif action == 'pre_clear':
+        forget(instance.object_shares.values_list('app_object_id', flat=True))
+
+
+@receiver(post_delete, sender=AppObject)
+def forget_deleted_access(sender, instance, **kwargs):
+    forget([instance.pk])
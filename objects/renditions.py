@@ -0,0 +1,145 @@
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AppObject, Rendition
+from .storage import delete_keys, get_s3_client
+from .thumbnails import CONTENT_TYPES, render
+
+RENDERED_FILE_TYPES = ('image', 'pdf')
+
+
+def queue_renditions(app_objects):
+    """Queues the previews of the available images and PDFs among ``app_objects``."""
+    Rendition.objects.bulk_create(
+        [Rendition(app_object=app_object, size=size)
+         for app_object in app_objects
+         if app_object.status == AppObject.Status.AVAILABLE
+         and app_object.file_type in RENDERED_FILE_TYPES
+         for size in settings.OBJECT_RENDITION_SIZES],
+        ignore_conflicts=True)
+
+
+def rendition_keys(app_object_ids):
+    """Returns the S3 keys of the rendered previews of the given objects."""
+    return list(Rendition.objects.filter(
+        app_object_id__in=app_object_ids, status=Rendition.Status.READY,
+    ).values_list('storage_key', flat=True))
+
+
+def claim_batch(batch_size):
+    """
+    Leases up to ``batch_size`` due renditions to this worker, like the
+    email outbox does: each lease is an UPDATE conditional on the
+    ``next_attempt_at`` that was read, so a rendition another worker leased
+    first, which ``select_for_update`` does not prevent on SQLite, is left
+    to that worker.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.OBJECT_RENDITION_LEASE_SECONDS)
+    with transaction.atomic():
+        due = Rendition.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status=Rendition.Status.PENDING, next_attempt_at__lte=now,
+        ).select_related('app_object__blob').order_by('next_attempt_at')[:batch_size]
+        batch = [rendition for rendition in due if Rendition.objects.filter(
+            pk=rendition.pk, status=Rendition.Status.PENDING,
+            next_attempt_at=rendition.next_attempt_at).update(next_attempt_at=lease)]
+    return batch
+
+
+def mark_failed(rendition, error, retry=True):
+    rendition.attempts += 1
+    rendition.last_error = str(error)
+    if not retry or rendition.attempts >= settings.OBJECT_RENDITION_MAX_ATTEMPTS:
+        rendition.status = Rendition.Status.FAILED
+    else:
+        backoff = settings.OBJECT_RENDITION_RETRY_BACKOFF * 2 ** (rendition.attempts - 1)
+        rendition.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+
+
+def store_renditions(s3_client, future, renditions):
+    image_format = settings.OBJECT_RENDITION_FORMAT
+    try:
+        images = future.result()
+        for rendition in renditions:
+            storage_key = f'renditions/{rendition.app_object_id}/{rendition.size}.{image_format}'
+            s3_client.put_object(
+                ACL='private', Body=images[rendition.size], Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=storage_key, ContentType=CONTENT_TYPES[image_format])
+            rendition.storage_key = storage_key
+            rendition.content_type = CONTENT_TYPES[image_format]
+            rendition.bytes = len(images[rendition.size])
+            rendition.status = Rendition.Status.READY
+            rendition.attempts += 1
+    except Exception as e:
+        # Whatever a corrupt file makes the decoder raise, or an S3 error
+        for rendition in renditions:
+            if rendition.status != Rendition.Status.READY:
+                mark_failed(rendition, e)
+
+
+def render_batch(executor, batch, max_in_flight):
+    """
+    Renders ``batch`` in the worker processes of ``executor`` and stores the
+    results. Originals are downloaded here, at most ``max_in_flight`` at a
+    time, so the workers only ever see bytes.
+    """
+    s3_client = get_s3_client()
+    by_object = defaultdict(list)
+    for rendition in batch:
+        by_object[rendition.app_object_id].append(rendition)
+
+    in_flight = {}
+    for renditions in by_object.values():
+        if len(in_flight) >= max_in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                store_renditions(s3_client, future, in_flight.pop(future))
+
+        app_object = renditions[0].app_object
+        if app_object.size > settings.OBJECT_RENDITION_MAX_SOURCE_SIZE:
+            for rendition in renditions:
+                mark_failed(rendition, 'Original is too large to preview.', retry=False)
+            continue
+        try:
+            data = s3_client.get_object(
+                Bucket=settings.ARVAN_BUCKET_NAME, Key=app_object.storage_key)['Body'].read()
+        except Exception as e:
+            for rendition in renditions:
+                mark_failed(rendition, e)
+            continue
+        future = executor.submit(
+            render, data, app_object.file_type, [rendition.size for rendition in renditions],
+            settings.OBJECT_RENDITION_FORMAT, settings.OBJECT_RENDITION_QUALITY)
+        in_flight[future] = renditions
+
+    for future in wait(in_flight).done:
+        store_renditions(s3_client, future, in_flight[future])
+
+    Rendition.objects.bulk_update(batch, [
+        'status', 'storage_key', 'content_type', 'bytes', 'attempts', 'next_attempt_at', 'last_error'])
+
+    # Objects deleted while they were rendered leave nothing behind in S3
+    ready = {rendition.pk: rendition.storage_key for rendition in batch
+             if rendition.status == Rendition.Status.READY}
+    kept = set(Rendition.objects.filter(pk__in=ready).values_list('pk', flat=True))
+    orphans = [storage_key for pk, storage_key in ready.items() if pk not in kept]
+    if orphans:
+        delete_keys(s3_client, orphans)
+    return len(kept)
+
+
+def process_renditions(executor, batch_size=None, max_in_flight=None):
+    """Renders due previews until none are left; returns how many were stored."""
+    batch_size = batch_size or settings.OBJECT_RENDITION_BATCH_SIZE
+    max_in_flight = max_in_flight or settings.OBJECT_RENDITION_WORKERS * 2
+    rendered = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return rendered
+        rendered += render_batch(executor, batch, max_in_flight)
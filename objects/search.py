@@ -0,0 +1,98 @@
+import re
+
+from django.db.models import Exists, OuterRef
+
+from .models import AppObject, AppObjectShare, SearchToken
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Splits ``text`` into the case-folded words it is indexed and searched by."""
+    return {token[:100] for token in TOKEN_RE.findall(text.casefold())}
+
+
+def _tokens(app_object, user_ids):
+    return [SearchToken(user_id=user_id, token=token, app_object=app_object,
+                        object_uploaded_at=app_object.uploaded_at)
+            for token in tokenize(app_object.name) for user_id in user_ids]
+
+
+def index_objects(app_objects):
+    """Indexes the names of available objects for their owners and sharees."""
+    app_objects = [app_object for app_object in app_objects
+                   if app_object.status == AppObject.Status.AVAILABLE]
+    if not app_objects:
+        return
+
+    user_ids = {app_object.pk: {app_object.owner_id} - {None} for app_object in app_objects}
+    shares = AppObjectShare.objects.filter(
+        app_object_id__in=user_ids).values_list('app_object_id', 'user_id')
+    for app_object_id, user_id in shares:
+        user_ids[app_object_id].add(user_id)
+
+    SearchToken.objects.bulk_create(
+        [token for app_object in app_objects for token in _tokens(app_object, user_ids[app_object.pk])],
+        ignore_conflicts=True, batch_size=1000)
+
+
+def index_shares(shares):
+    """Indexes the names of shared objects for the ``(app_object, user_id)`` pairs given."""
+    SearchToken.objects.bulk_create(
+        [token for app_object, user_id in shares
+         if app_object.status == AppObject.Status.AVAILABLE
+         for token in _tokens(app_object, [user_id])],
+        ignore_conflicts=True, batch_size=1000)
+
+
+def unindex_shares(app_object_ids, user_ids):
+    """Drops the index rows of every given user for every given object."""
+    SearchToken.objects.filter(app_object_id__in=app_object_ids, user_id__in=user_ids).delete()
+
+
+def prefix_filter(field, prefix):
+    # A range rather than LIKE, so the index is used on every backend
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'}
+
+
+class NameSearch:
+    """
+    Available objects visible to a user whose name has a word starting with
+    each word of ``query``, in the same order and cursor pages as the object
+    list. Shares are in the token index too, so owned and shared objects are
+    matched by one index range instead of two branches.
+    """
+    model = AppObject
+
+    def __init__(self, user, query):
+        self.user = user
+        self.terms = sorted(tokenize(query), key=len, reverse=True)
+
+    def matches(self):
+        # The longest term is likely the most selective one to scan; the
+        # others are probed per candidate through the same index.
+        tokens = SearchToken.objects.filter(user=self.user, **prefix_filter('token', self.terms[0]))
+        for term in self.terms[1:]:
+            tokens = tokens.filter(Exists(SearchToken.objects.filter(
+                user=self.user, app_object=OuterRef('app_object'), **prefix_filter('token', term))))
+        return tokens
+
+    def count(self):
+        return self.matches().values('app_object_id').distinct().count()
+
+    def fetch(self, pagination, position, forward, limit):
+        """Returns up to ``limit`` objects past ``position`` in fetch order."""
+        if pagination.ordering_field != 'uploaded_at':
+            raise ValueError('Name search is ordered by upload time only.')
+
+        tokens = self.matches()
+        if position is not None:
+            tokens = pagination.seek(tokens, position[0], position[1], forward,
+                                     field='object_uploaded_at', key_field='app_object_id')
+        # Several words of one name can match the same term
+        object_keys = list(tokens.order_by(*pagination.get_ordering(
+            forward, field='object_uploaded_at', key_field='app_object_id'),
+        ).values_list('app_object_id', flat=True).distinct()[:limit])
+
+        app_objects = AppObject.objects.filter(status=AppObject.Status.AVAILABLE).in_bulk(object_keys)
+        return [app_objects[key] for key in object_keys if key in app_objects]
@@ -1,6 +1,10 @@
 from rest_framework import serializers
-from .models import AppObject
+from .models import AppObject, StorageUsage
+from .search import prefix_filter
 
+from user.serializers import UserSerializer
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -17,10 +21,77 @@ class AppObjectSerializer(serializers.ModelSerializer):
     def get_is_owner(self, obj):
         request = self.context.get('request', None)
         if request:
-            return obj.owner == request.user
+            # Compare ids so the owner row is never fetched
+            return obj.owner_id == request.user.id
         return False
 
 
 class AccessUpdateSerializer(serializers.Serializer):
     shared_with = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), many=True)
+
+
+class PresignedUploadSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=0)
+
+
+class MultipartPartUrlsSerializer(serializers.Serializer):
+    object_key = serializers.CharField()
+    part_numbers = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    object_keys = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=10000)
+
+
+class BulkAccessUpdateSerializer(serializers.Serializer):
+    object_keys = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=10000)
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    action = serializers.ChoiceField(choices=['grant', 'revoke'])
+
+    def validate(self, data):
+        pairs = len(set(data['object_keys'])) * len(set(data['user_ids']))
+        if pairs > settings.OBJECT_BULK_ACCESS_MAX_PAIRS:
+            raise serializers.ValidationError(
+                f"At most {settings.OBJECT_BULK_ACCESS_MAX_PAIRS} object and user pairs per request.")
+        return data
+
+
+class ObjectListFilterSerializer(serializers.Serializer):
+    file_type = serializers.ChoiceField(choices=StorageUsage.FILE_TYPES, required=False)
+    mime = serializers.CharField(max_length=50, required=False)
+    min_size = serializers.IntegerField(min_value=0, required=False)
+    max_size = serializers.IntegerField(min_value=0, required=False)
+    uploaded_after = serializers.DateTimeField(required=False)
+    uploaded_before = serializers.DateTimeField(required=False)
+
+    def to_filters(self):
+        """Returns the validated parameters as ``AppObject`` lookups."""
+        data = self.validated_data
+        filters = {}
+        if 'file_type' in data:
+            filters['file_type'] = data['file_type']
+        if 'mime' in data:
+            filters.update(prefix_filter('mime_type', data['mime']))
+        if 'min_size' in data:
+            filters['size__gte'] = data['min_size']
+        if 'max_size' in data:
+            filters['size__lte'] = data['max_size']
+        if 'uploaded_after' in data:
+            filters['uploaded_at__gte'] = data['uploaded_after']
+        if 'uploaded_before' in data:
+            filters['uploaded_at__lt'] = data['uploaded_before']
+        return filters
+
+
+class UserAccessSerializer(UserSerializer):
+    has_access = serializers.BooleanField(read_only=True)
+    is_owner = serializers.BooleanField(read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['has_access', 'is_owner']
@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AppObject, DailyUploadStat, TypeStat
+
+
+def _add(model, deltas):
+    # One UPDATE per rollup row; a row missing the first time is inserted
+    # and the UPDATE retried, which is safe against concurrent inserts.
+    for lookup, (count, size) in deltas.items():
+        lookup = dict(lookup)
+        rows = model.objects.filter(**lookup)
+        changes = {'count': F('count') + count, 'bytes': F('bytes') + size}
+        if not rows.update(**changes):
+            model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+            rows.update(**changes)
+
+
+def _group(app_objects, key, sign=1):
+    deltas = defaultdict(lambda: (0, 0))
+    for app_object in app_objects:
+        # Every object counts for its owner and for the system-wide total
+        for user_id in {app_object.owner_id, None}:
+            lookup = tuple(sorted({'user_id': user_id, **key(app_object)}.items()))
+            count, size = deltas[lookup]
+            deltas[lookup] = (count + sign, size + sign * app_object.size)
+    return deltas
+
+
+def _type_key(app_object):
+    return {'file_type': app_object.file_type, 'mime_type': app_object.mime_type}
+
+
+def _day_key(app_object):
+    return {'day': timezone.localdate(app_object.uploaded_at)}
+
+
+def record_uploads(app_objects):
+    """Adds objects that just became available to the rollups."""
+    app_objects = list(app_objects)
+    _add(TypeStat, _group(app_objects, _type_key))
+    _add(DailyUploadStat, _group(app_objects, _day_key))
+
+
+def record_deletes(app_objects):
+    """
+    Removes deleted objects from the type rollups. Upload counts per day
+    are history and keep them.
+    """
+    _add(TypeStat, _group([app_object for app_object in app_objects
+                           if app_object.status == AppObject.Status.AVAILABLE],
+                          _type_key, sign=-1))
+
+
+def rebuild():
+    """
+    Recomputes every rollup from the objects table. Daily upload counts can
+    only be rebuilt for objects that still exist.
+    """
+    available = AppObject.objects.filter(status=AppObject.Status.AVAILABLE)
+    type_rows = available.values('owner_id', 'file_type', 'mime_type').annotate(
+        count=Count('pk'), bytes=Sum('size'))
+    daily_rows = available.annotate(day=TruncDate('uploaded_at')).values(
+        'owner_id', 'day').annotate(count=Count('pk'), bytes=Sum('size'))
+
+    type_stats = defaultdict(lambda: [0, 0])
+    for row in type_rows:
+        for user_id in {row['owner_id'], None}:
+            totals = type_stats[user_id, row['file_type'], row['mime_type']]
+            totals[0] += row['count']
+            totals[1] += row['bytes']
+    daily_stats = defaultdict(lambda: [0, 0])
+    for row in daily_rows:
+        for user_id in {row['owner_id'], None}:
+            totals = daily_stats[user_id, row['day']]
+            totals[0] += row['count']
+            totals[1] += row['bytes']
+
+    with transaction.atomic():
+        TypeStat.objects.all().delete()
+        DailyUploadStat.objects.all().delete()
+        TypeStat.objects.bulk_create(
+            (TypeStat(user_id=user_id, file_type=file_type, mime_type=mime_type,
+                      count=count, bytes=size)
+             for (user_id, file_type, mime_type), (count, size) in type_stats.items()),
+            batch_size=1000)
+        DailyUploadStat.objects.bulk_create(
+            (DailyUploadStat(user_id=user_id, day=day, count=count, bytes=size)
+             for (user_id, day), (count, size) in daily_stats.items()),
+            batch_size=1000)
+    return len(type_stats), len(daily_stats)
+
+
+def summarize(user_id, since, largest):
+    """
+    Builds the stats of one user, or system-wide for ``None``, from the
+    rollups and the size indexes; no query scans the objects table.
+    """
+    by_file_type = defaultdict(lambda: {'count': 0, 'bytes': 0})
+    by_mime_type = []
+    for stat in TypeStat.objects.filter(user_id=user_id, count__gt=0).order_by('-bytes'):
+        totals = by_file_type[stat.file_type]
+        totals['count'] += stat.count
+        totals['bytes'] += stat.bytes
+        by_mime_type.append({'mime_type': stat.mime_type, 'count': stat.count, 'bytes': stat.bytes})
+
+    uploads_per_day = DailyUploadStat.objects.filter(
+        user_id=user_id, day__gte=since).order_by('day').values('day', 'count', 'bytes')
+
+    objects = AppObject.objects.filter(status=AppObject.Status.AVAILABLE)
+    if user_id is not None:
+        objects = objects.filter(owner_id=user_id)
+    largest_objects = objects.order_by('-size').values(
+        'object_key', 'name', 'size', 'mime_type', 'file_type')[:largest]
+
+    return {
+        'count': sum(totals['count'] for totals in by_file_type.values()),
+        'bytes': sum(totals['bytes'] for totals in by_file_type.values()),
+        'by_file_type': [{'file_type': file_type, **totals}
+                         for file_type, totals in sorted(by_file_type.items())],
+        'by_mime_type': by_mime_type,
+        'uploads_per_day': list(uploads_per_day),
+        'largest': list(largest_objects),
+    }
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from django.conf import settings
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+# DeleteObjects accepts at most this many keys per call
+DELETE_BATCH_SIZE = 1000
+
+
+def create_s3_client():
+    config = Config(
+        max_pool_connections=settings.ARVAN_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.ARVAN_CONNECT_TIMEOUT,
+        read_timeout=settings.ARVAN_READ_TIMEOUT,
+        tcp_keepalive=True,
+        retries={'max_attempts': settings.ARVAN_MAX_ATTEMPTS, 'mode': 'standard'},
+    )
+    # A private session keeps credential resolution off boto3's global
+    # default session, which is not safe to share between threads.
+    session = boto3.session.Session(
+        aws_access_key_id=settings.ARVAN_ACCESS_KEY,
+        aws_secret_access_key=settings.ARVAN_SECRET_KEY
+    )
+    return session.client('s3', endpoint_url=settings.ARVAN_ENDPOINT, config=config)
+
+
+def get_s3_client():
+    """
+    Returns the S3 client shared by every thread of this process.
+
+    The client is built on first use. botocore clients are thread-safe, so all
+    requests reuse the same connection pool instead of paying for session
+    setup and fresh TLS handshakes each time.
+    """
+    global _client, _client_pid
+
+    client = _client
+    if client is not None and _client_pid == os.getpid():
+        return client
+
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = create_s3_client()
+            _client_pid = os.getpid()
+        return _client
+
+
+def reset_s3_client():
+    """Drops the shared client so the next call builds a new one."""
+    global _client, _client_pid, _lock
+
+    _client = None
+    _client_pid = None
+    # The parent may have held the lock at the moment it forked
+    _lock = threading.Lock()
+
+
+def delete_keys(s3_client, object_keys):
+    """
+    Deletes ``object_keys`` from the bucket in as few DeleteObjects calls as
+    possible and returns a ``{key: error_code}`` dict of the keys that failed.
+    """
+    object_keys = list(object_keys)
+    errors = {}
+    for start in range(0, len(object_keys), DELETE_BATCH_SIZE):
+        batch = object_keys[start:start + DELETE_BATCH_SIZE]
+        try:
+            result = s3_client.delete_objects(
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        except ClientError as e:
+            errors.update(dict.fromkeys(batch, e.response['Error'].get('Code', 'Unknown')))
+            continue
+        # Quiet mode only reports the keys that could not be deleted
+        errors.update((error['Key'], error.get('Code', 'Unknown'))
+                      for error in result.get('Errors', []))
+    return errors
+
+
+# Pooled sockets must not be shared with a forked worker process
+os.register_at_fork(after_in_child=reset_s3_client)
@@ -1,18 +1,64 @@
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import hashlib
+import io
 import os
 
-from .models import AppObject
+from outbox.models import OutgoingEmail
+
+from .models import AppObject, AppObjectShare, Blob, MultipartUpload, Rendition, SearchToken, StorageUsage, TypeStat
+from . import access, quotas, storage, thumbnails
+from .pagination import VisibleObjectsPagination
+from .queries import VisibleObjects, shared_field
+from .ranges import parse_range_header
+from .renditions import claim_batch, process_renditions
 
 User = get_user_model()
 
 
+class S3ClientTests(TestCase):
+
+    def tearDown(self):
+        storage.reset_s3_client()
+
+    @patch('objects.storage.create_s3_client')
+    def test_client_is_shared_per_process(self, mock_create_s3_client):
+        mock_create_s3_client.side_effect = lambda: MagicMock()
+        storage.reset_s3_client()
+
+        client = storage.get_s3_client()
+        self.assertIs(storage.get_s3_client(), client)
+        self.assertEqual(mock_create_s3_client.call_count, 1)
+
+        # A forked child sees a different pid and builds its own client
+        with patch('objects.storage.os.getpid', return_value=-1):
+            self.assertIsNot(storage.get_s3_client(), client)
+
+    @override_settings(ARVAN_ENDPOINT='https://s3.example.test', ARVAN_MAX_POOL_CONNECTIONS=50)
+    def test_client_pool_configuration(self):
+        client = storage.create_s3_client()
+        self.assertEqual(client.meta.config.max_pool_connections, 50)
+        self.assertTrue(client.meta.config.tcp_keepalive)
+        self.assertEqual(client.meta.endpoint_url, 'https://s3.example.test')
+
+
 class UploadObjectViewTests(TestCase):
 
     def setUp(self):
@@ -23,25 +69,576 @@ class UploadObjectViewTests(TestCase):
         # Ensure the correct URL name is used
         self.url = reverse('upload-object')
 
-    @patch('boto3.resource')
-    def test_upload_object(self, mock_boto3_resource):
-        mock_s3_resource = MagicMock()
-        mock_boto3_resource.return_value = mock_s3_resource
-        mock_bucket = MagicMock()
-        mock_s3_resource.Bucket.return_value = mock_bucket
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_upload_object(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_client.upload_part.side_effect = lambda **kwargs: {
+            'ETag': f'"etag-{kwargs["PartNumber"]}"'}
 
         with open('testfile.txt', 'w') as f:
             f.write('test content')
-        with open('testfile.txt', 'rb') as f:
+        with override_settings(OBJECT_MULTIPART_PART_SIZE=5), open('testfile.txt', 'rb') as f:
             response = self.client.put(self.url, {'object': f})
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['message'],
                          "Object uploaded successfully.")
+        self.assertEqual(response.data['sha256'],
+                         hashlib.sha256(b'test content').hexdigest())
+        app_object = AppObject.objects.get()
+        self.assertEqual(app_object.size, 12)
+        self.assertEqual(
+            mock_client.create_multipart_upload.call_args.kwargs['Key'], app_object.object_key)
+        parts = [call.kwargs['Body'] for call in mock_client.upload_part.call_args_list]
+        self.assertEqual(parts, [b'test ', b'conte', b'nt'])
+        self.assertEqual(
+            mock_client.complete_multipart_upload.call_args.kwargs['MultipartUpload']['Parts'],
+            [{'ETag': f'"etag-{n}"', 'PartNumber': n} for n in (1, 2, 3)])
+        mock_client.put_object.assert_not_called()
+
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_upload_aborted_on_failure(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_client.upload_part.side_effect = ClientError(
+            {'Error': {'Code': 'SlowDown'}}, 'UploadPart')
+
+        upload = io.BytesIO(b'x' * 64)
+        upload.name = 'big.bin'
+        with override_settings(OBJECT_MULTIPART_PART_SIZE=16), self.assertRaises(ClientError):
+            self.client.put(self.url, {'object': upload})
+
+        mock_client.abort_multipart_upload.assert_called_once_with(
+            Bucket='djangowebstorage', Key=mock_client.create_multipart_upload.call_args.kwargs['Key'],
+            UploadId='upload-1')
+        self.assertFalse(AppObject.objects.exists())
+
+
+class DeduplicationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content, name='setup.exe', **headers):
+        upload = io.BytesIO(content)
+        upload.name = name
+        return self.client.put(reverse('upload-object'), {'object': upload}, headers=headers)
+
+    @patch('objects.views.get_s3_client')
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_known_content_is_not_sent_again(self, mock_get_s3_client, mock_views_s3_client):
+        mock_client = mock_get_s3_client.return_value
+
+        first = self.upload(b'installer bytes')
+        second = self.upload(b'installer bytes', name='copy.exe')
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        # Content is shared across users, so whether it was already stored
+        # is not revealed
+        self.assertNotIn('deduplicated', second.data)
+        mock_client.put_object.assert_called_once()
+        blob = Blob.objects.get()
+        self.assertEqual(blob.storage_key, first.data['object_key'])
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.sha256, hashlib.sha256(b'installer bytes').hexdigest())
+
+        # Deleting one copy keeps the bytes, deleting the last one removes them
+        views_client = mock_views_s3_client.return_value
+        self.client.delete(reverse('delete-object'), {'object_key': first.data['object_key']})
+        views_client.delete_objects.assert_not_called()
+        views_client.delete_object.assert_not_called()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+        views_client.delete_objects.return_value = {}
+        self.client.delete(reverse('delete-object'), {'object_key': second.data['object_key']})
+        views_client.delete_objects.assert_called_once_with(
+            Bucket='djangowebstorage',
+            Delete={'Objects': [{'Key': blob.storage_key}], 'Quiet': True})
+        self.assertFalse(Blob.objects.exists())
+
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_declared_hash_skips_large_upload(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_client.upload_part.return_value = {'ETag': '"etag"'}
+        content = b'x' * 64
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        with override_settings(OBJECT_MULTIPART_PART_SIZE=16):
+            self.upload(content)
+            mock_client.reset_mock()
+            response = self.upload(content, **{'X-Content-SHA256': sha256})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_client.create_multipart_upload.assert_not_called()
+        mock_client.upload_part.assert_not_called()
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_declared_hash_mismatch(self, mock_get_s3_client):
+        self.upload(b'original')
+        response = self.upload(b'tampered', **{
+            'X-Content-SHA256': hashlib.sha256(b'original').hexdigest()})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(AppObject.objects.count(), 1)
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+
+class StorageQuotaTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content, name='notes.txt'):
+        upload = io.BytesIO(content)
+        upload.name = name
+        return self.client.put(reverse('upload-object'), {'object': upload})
+
+    @patch('objects.views.get_s3_client')
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_usage_follows_uploads_and_deletes(self, mock_get_s3_client, mock_views_s3_client):
+        self.upload(b'hello')
+        response = self.upload(b'%PDF-1.4', name='paper.pdf')
+
+        usage = StorageUsage.objects.get(user=self.user)
+        self.assertEqual((usage.bytes_used, usage.object_count), (13, 2))
+        self.assertEqual((usage.others_bytes, usage.pdf_bytes), (5, 8))
+
+        mock_views_s3_client.return_value.delete_objects.return_value = {}
+        self.client.delete(reverse('delete-object'), {'object_key': response.data['object_key']})
+        usage.refresh_from_db()
+        self.assertEqual((usage.bytes_used, usage.object_count, usage.pdf_bytes), (5, 1, 0))
+
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_upload_over_quota(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_client.upload_part.return_value = {'ETag': '"etag"'}
+        StorageUsage.objects.create(user=self.user, quota_bytes=40, bytes_used=10)
+
+        with override_settings(OBJECT_MULTIPART_PART_SIZE=16):
+            response = self.upload(b'x' * 64)
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        # The excess arrived before a full part did, so nothing was sent
+        mock_client.upload_part.assert_not_called()
+        mock_client.put_object.assert_not_called()
+        self.assertFalse(AppObject.objects.exists())
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, 10)
+
+    @patch('objects.views.get_s3_client')
+    def test_presigned_upload_over_quota(self, mock_get_s3_client):
+        with override_settings(OBJECT_STORAGE_QUOTA=100):
+            response = self.client.post(reverse('presigned-upload'), {'name': 'big.iso', 'size': 101})
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        mock_get_s3_client.return_value.generate_presigned_post.assert_not_called()
+
+    @patch('objects.views.get_s3_client')
+    def test_failed_upload_start_releases_reservation(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.generate_presigned_post.side_effect = ValueError('Bad credentials')
+        with self.assertRaises(ValueError):
+            self.client.post(reverse('presigned-upload'), {'name': 'a.txt', 'size': 10})
+
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        with patch.object(MultipartUpload.objects, 'create', side_effect=DatabaseError('disk full')), \
+                self.assertRaises(DatabaseError):
+            self.client.post(reverse('multipart-initiate'), {'name': 'a.txt', 'size': 10})
+
+        self.assertFalse(AppObject.objects.exists())
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, 0)
+
+    def test_reserve_is_a_single_query(self):
+        StorageUsage.objects.create(user=self.user)
+        with self.assertNumQueries(1):
+            quotas.reserve(self.user.id, [('image', 10), ('pdf', 5)])
+        with override_settings(OBJECT_STORAGE_QUOTA=20), self.assertRaises(quotas.QuotaExceeded):
+            quotas.reserve(self.user.id, [('image', 10)])
+
+    def test_reconcile_storage_usage(self):
+        AppObject.objects.create(object_key='a', name='a.png', owner=self.user, size=7,
+                                 mime_type='image/png', file_type='image')
+        StorageUsage.objects.create(user=self.user, quota_bytes=1000, bytes_used=999, object_count=5)
+
+        call_command('reconcile_storage_usage', stdout=io.StringIO())
+
+        usage = StorageUsage.objects.get(user=self.user)
+        self.assertEqual((usage.bytes_used, usage.object_count, usage.image_bytes), (7, 1, 7))
+        self.assertEqual(usage.quota_bytes, 1000)
+
+
+class StatsViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.other_user = User.objects.create_user(
+            username='otheruser', email="other@test.com", password='otherpass', is_staff=True)
+        self.url = reverse('storage-stats')
+
+    def upload(self, user, content, name):
+        self.client.force_authenticate(user=user)
+        upload = io.BytesIO(content)
+        upload.name = name
+        return self.client.put(reverse('upload-object'), {'object': upload})
+
+    @patch('objects.views.get_s3_client')
+    @patch('objects.uploadhandlers.get_s3_client')
+    def test_stats_follow_uploads_and_deletes(self, mock_get_s3_client, mock_views_s3_client):
+        self.upload(self.user, b'1234', 'a.txt')
+        response = self.upload(self.user, b'123456', 'b.pdf')
+        self.upload(self.other_user, b'12', 'c.txt')
+        mock_views_s3_client.return_value.delete_objects.return_value = {}
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(reverse('delete-object'), {'object_key': response.data['object_key']})
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        stats = response.data['user']
+        self.assertEqual((stats['count'], stats['bytes']), (1, 4))
+        self.assertEqual(stats['by_file_type'], [{'file_type': 'others', 'count': 1, 'bytes': 4}])
+        self.assertEqual(stats['uploads_per_day'][0]['count'], 2)
+        self.assertEqual([obj['name'] for obj in stats['largest']], ['a.txt'])
+        self.assertNotIn('system', response.data)
+
+        self.client.force_authenticate(user=self.other_user)
+        system = self.client.get(self.url).data['system']
+        self.assertEqual((system['count'], system['bytes']), (2, 6))
+        self.assertEqual(system['uploads_per_day'][0]['count'], 3)
+        self.assertEqual(system['by_mime_type'], [{'mime_type': 'text/plain', 'count': 2, 'bytes': 6}])
+
+        # A rebuild arrives at the same type totals
+        expected = sorted(TypeStat.objects.filter(count__gt=0).values_list(
+            'user_id', 'file_type', 'mime_type', 'count', 'bytes'), key=str)
+        call_command('rebuild_stats', stdout=io.StringIO())
+        self.assertEqual(sorted(TypeStat.objects.values_list(
+            'user_id', 'file_type', 'mime_type', 'count', 'bytes'), key=str), expected)
+
+
+class BatchUploadObjectViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('batch-upload')
+
+    def make_files(self, *names):
+        files = []
+        for name in names:
+            upload = io.BytesIO(name.encode())
+            upload.name = name
+            files.append(upload)
+        return files
+
+    @patch('objects.views.get_s3_client')
+    def test_batch_upload(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, {'objects': self.make_files('a.txt', 'b.pdf', 'c.png')})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['status'] for r in response.data['results']], ['uploaded'] * 3)
+        self.assertEqual(mock_client.put_object.call_count, 3)
+        inserts = [q for q in queries.captured_queries
+                   if q['sql'].startswith('INSERT INTO "objects_appobject"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            dict(AppObject.objects.filter(owner=self.user).values_list('name', 'file_type')),
+            {'a.txt': 'others', 'b.pdf': 'pdf', 'c.png': 'image'})
+
+    @patch('objects.views.get_s3_client')
+    def test_batch_upload_partial_failure(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+
+        def put_object(**kwargs):
+            if kwargs['Body'].name == 'b.txt':
+                raise ClientError({'Error': {'Code': 'SlowDown'}}, 'PutObject')
+
+        mock_client.put_object.side_effect = put_object
+
+        response = self.client.post(
+            self.url, {'objects': self.make_files('a.txt', 'b.txt', 'c.txt')})
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['uploaded', 'failed', 'uploaded'])
+        self.assertEqual(results[1]['error'], 'Storage error: SlowDown.')
+        self.assertEqual(
+            sorted(AppObject.objects.values_list('object_key', flat=True)),
+            sorted([results[0]['object_key'], results[2]['object_key']]))
+
+    @patch('objects.views.get_s3_client')
+    def test_batch_upload_unexpected_error_fails_one_file(self, mock_get_s3_client):
+        def put_object(**kwargs):
+            if kwargs['Body'].name == 'b.txt':
+                raise OSError('Temporary file is gone')
+
+        mock_get_s3_client.return_value.put_object.side_effect = put_object
+
+        response = self.client.post(self.url, {'objects': self.make_files('a.txt', 'b.txt')})
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][1]['error'], 'Storage error: OSError.')
+        # Only the stored file keeps its reservation
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, len(b'a.txt'))
+
+    @patch('objects.views.get_s3_client')
+    def test_batch_upload_stores_repeated_content_once(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        files = self.make_files('a.txt', 'b.txt')
+        copy = io.BytesIO(b'a.txt')
+        copy.name = 'copy.txt'
+
+        response = self.client.post(self.url, {'objects': files + [copy]})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mock_client.put_object.call_count, 2)
+        blob = AppObject.objects.get(name='copy.txt').blob
+        self.assertEqual(blob, AppObject.objects.get(name='a.txt').blob)
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_batch_upload_without_files(self):
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PresignedUploadTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    @patch('objects.views.get_s3_client')
+    def test_presigned_upload_flow(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.generate_presigned_post.return_value = {
+            'url': 'https://s3.test/djangowebstorage', 'fields': {'key': 'k'}}
+        mock_client.head_object.return_value = {'ContentLength': 42}
+
+        response = self.client.post(reverse('presigned-upload'),
+                                    {'name': 'report.pdf', 'size': 50})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['url'], 'https://s3.test/djangowebstorage')
+        app_object = AppObject.objects.get(object_key=response.data['object_key'])
+        self.assertEqual(app_object.status, AppObject.Status.PENDING)
+        self.assertEqual(app_object.file_type, 'pdf')
+
+        response = self.client.get(reverse('list-objects'))
+        self.assertEqual(len(response.data['results']), 0)
+
+        response = self.client.post(reverse('complete-upload'),
+                                    {'object_key': app_object.object_key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        app_object.refresh_from_db()
+        self.assertEqual(app_object.status, AppObject.Status.AVAILABLE)
+        self.assertEqual(app_object.size, 42)
+
+    @patch('objects.views.get_s3_client')
+    def test_concurrent_completions_count_once(self, mock_get_s3_client):
+        app_object = AppObject.objects.create(
+            object_key='pending-key', name='a.txt', owner=self.user, size=50,
+            mime_type='text/plain', file_type='others',
+            status=AppObject.Status.PENDING)
+        StorageUsage.objects.create(user=self.user, bytes_used=50, others_bytes=50, object_count=1)
+
+        # The other completion commits while this one asks S3 for the size
+        def head_object(**kwargs):
+            AppObject.objects.filter(pk=app_object.pk).update(size=42, status=AppObject.Status.AVAILABLE)
+            return {'ContentLength': 42}
+        mock_get_s3_client.return_value.head_object.side_effect = head_object
+
+        response = self.client.post(reverse('complete-upload'),
+                                    {'object_key': app_object.object_key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['size'], 42)
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, 50)
+        self.assertFalse(TypeStat.objects.exists())
+
+    @patch('objects.views.get_s3_client')
+    def test_complete_before_upload(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.head_object.side_effect = ClientError(
+            {'Error': {'Code': '404'}}, 'HeadObject')
+        app_object = AppObject.objects.create(
+            object_key='pending-key', name='a.txt', owner=self.user, size=1,
+            mime_type='text/plain', file_type='others',
+            status=AppObject.Status.PENDING)
+
+        response = self.client.post(reverse('complete-upload'),
+                                    {'object_key': app_object.object_key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        app_object.refresh_from_db()
+        self.assertEqual(app_object.status, AppObject.Status.PENDING)
+
+    @patch('objects.management.commands.expire_pending_uploads.get_s3_client')
+    def test_expire_pending_uploads(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.delete_objects.return_value = {}
+        for key in ('stale-key', 'fresh-key'):
+            AppObject.objects.create(
+                object_key=key, name='a.txt', owner=self.user, size=1,
+                mime_type='text/plain', file_type='others',
+                status=AppObject.Status.PENDING)
+        AppObject.objects.filter(object_key='stale-key').update(
+            uploaded_at=timezone.now() - timedelta(days=2))
+
+        call_command('expire_pending_uploads', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(AppObject.objects.values_list('object_key', flat=True)), ['fresh-key'])
+        mock_client.delete_objects.assert_called_once_with(
+            Bucket='djangowebstorage',
+            Delete={'Objects': [{'Key': 'stale-key'}], 'Quiet': True})
+
+    @patch('objects.management.commands.expire_pending_uploads.get_s3_client')
+    def test_expire_skips_uploads_completed_meanwhile(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.delete_objects.return_value = {}
+        for key in ('stale-key', 'completed-key'):
+            AppObject.objects.create(
+                object_key=key, name='a.txt', owner=self.user, size=1,
+                mime_type='text/plain', file_type='others',
+                status=AppObject.Status.PENDING)
+        AppObject.objects.update(uploaded_at=timezone.now() - timedelta(days=2))
+        StorageUsage.objects.create(user=self.user, bytes_used=2, others_bytes=2, object_count=2)
+
+        # The completion lands between the scan and the delete
+        multipart_uploads = MultipartUpload.objects.filter
+
+        def complete_then_filter(*args, **kwargs):
+            AppObject.objects.filter(object_key='completed-key').update(status=AppObject.Status.AVAILABLE)
+            return multipart_uploads(*args, **kwargs)
+
+        with patch.object(MultipartUpload.objects, 'filter', side_effect=complete_then_filter):
+            call_command('expire_pending_uploads', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(AppObject.objects.values_list('object_key', flat=True)), ['completed-key'])
+        mock_client.delete_objects.assert_called_once_with(
+            Bucket='djangowebstorage',
+            Delete={'Objects': [{'Key': 'stale-key'}], 'Quiet': True})
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, 1)
+
+
+class MultipartUploadTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email="test@test.com", password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(OBJECT_MULTIPART_PART_SIZE=5 * 1024 * 1024)
+    @patch('objects.views.get_s3_client')
+    def test_multipart_upload_flow(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        part_size = 5 * 1024 * 1024
+
+        response = self.client.post(reverse('multipart-initiate'),
+                                    {'name': 'movie.mp4', 'size': part_size + 10})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['part_count'], 2)
+        object_key = response.data['object_key']
+
+        # Only the first part has arrived: the client resumes from part 2
+        mock_client.list_parts.return_value = {
+            'Parts': [{'PartNumber': 1, 'ETag': '"e1"', 'Size': part_size}]}
+        response = self.client.get(reverse('multipart-parts'), {'object_key': object_key})
+        self.assertEqual(response.data['uploaded_bytes'], part_size)
+        response = self.client.post(reverse('multipart-complete'), {'object_key': object_key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_parts'], [2])
+
+        mock_client.list_parts.return_value = {
+            'Parts': [{'PartNumber': 1, 'ETag': '"e1"', 'Size': part_size},
+                      {'PartNumber': 2, 'ETag': '"e2"', 'Size': 10}]}
+        response = self.client.post(reverse('multipart-complete'), {'object_key': object_key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_client.complete_multipart_upload.assert_called_once_with(
+            Bucket='djangowebstorage', Key=object_key, UploadId='upload-1',
+            MultipartUpload={'Parts': [{'ETag': '"e1"', 'PartNumber': 1},
+                                       {'ETag': '"e2"', 'PartNumber': 2}]})
+        app_object = AppObject.objects.get(object_key=object_key)
+        self.assertEqual(app_object.status, AppObject.Status.AVAILABLE)
+        self.assertEqual(app_object.size, part_size + 10)
+        self.assertFalse(MultipartUpload.objects.exists())
+
+    @patch('objects.views.get_s3_client')
+    def test_parts_larger_than_declared_size(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        response = self.client.post(reverse('multipart-initiate'), {'name': 'movie.mp4', 'size': 100})
+        object_key = response.data['object_key']
+
+        mock_client.list_parts.return_value = {
+            'Parts': [{'PartNumber': 1, 'ETag': '"e1"', 'Size': 10 ** 12}]}
+        response = self.client.post(reverse('multipart-complete'), {'object_key': object_key})
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        mock_client.complete_multipart_upload.assert_not_called()
+        self.assertEqual(AppObject.objects.get(object_key=object_key).status, AppObject.Status.PENDING)
+        self.assertEqual(StorageUsage.objects.get(user=self.user).bytes_used, 100)
+
+    @patch('objects.views.get_s3_client')
+    def test_abort_multipart_upload(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+
+        response = self.client.post(reverse('multipart-initiate'),
+                                    {'name': 'movie.mp4', 'size': 100})
+        object_key = response.data['object_key']
+        response = self.client.post(reverse('multipart-abort'), {'object_key': object_key})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_client.abort_multipart_upload.assert_called_once_with(
+            Bucket='djangowebstorage', Key=object_key, UploadId='upload-1')
+        self.assertFalse(AppObject.objects.filter(object_key=object_key).exists())
+
+    @patch('objects.views.get_s3_client')
+    def test_deleting_pending_upload_aborts_it(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.create_multipart_upload.side_effect = [{'UploadId': 'upload-1'}, {'UploadId': 'upload-2'}]
+        mock_client.delete_objects.return_value = {}
+        object_keys = [self.client.post(reverse('multipart-initiate'),
+                                        {'name': 'movie.mp4', 'size': 100}).data['object_key']
+                       for _ in range(2)]
+
+        response = self.client.delete(reverse('delete-object'), {'object_key': object_keys[0]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_client.abort_multipart_upload.assert_called_once_with(
+            Bucket='djangowebstorage', Key=object_keys[0], UploadId='upload-1')
+
+        mock_client.abort_multipart_upload.reset_mock()
+        mock_client.abort_multipart_upload.side_effect = ClientError(
+            {'Error': {'Code': 'SlowDown'}}, 'AbortMultipartUpload')
+        response = self.client.delete(reverse('bulk-delete-objects'),
+                                      {'object_keys': [object_keys[1]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][0]['error'], "Storage error: SlowDown.")
+        # The row, and with it the upload id, is kept for a retry
+        self.assertTrue(MultipartUpload.objects.filter(app_object_id=object_keys[1]).exists())
 
 
 class DownloadObjectViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='testuser', email="test@test.com", password='testpass')
@@ -84,6 +681,336 @@ class DownloadObjectViewTests(TestCase):
         self.assertEqual(
             response.data['error'], "You do not have permission to access this object.")
 
+    @patch('objects.views.get_s3_client')
+    def test_download_streams_object(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.get_object.return_value = {
+            'Body': StreamingBody(io.BytesIO(b'test content'), 12),
+            'ContentLength': 12,
+        }
+
+        self.client.force_authenticate(user=self.shared_user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), b'test content')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Length'], '12')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="testfile.txt"')
+        mock_client.get_object.assert_called_once_with(
+            Bucket='djangowebstorage', Key='test-key')
+
+    @patch('objects.views.get_s3_client')
+    def test_download_single_range(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.get_object.return_value = {
+            'Body': StreamingBody(io.BytesIO(b'0123456789'), 10),
+            'ContentLength': 10,
+        }
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key}, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        mock_client.get_object.assert_called_once_with(
+            Bucket='djangowebstorage', Key='test-key', Range='bytes=10-19')
+
+    @patch('objects.views.get_s3_client')
+    def test_download_multiple_ranges(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.get_object.side_effect = [
+            {'Body': StreamingBody(io.BytesIO(b'ab'), 2), 'ContentLength': 2},
+            {'Body': StreamingBody(io.BytesIO(b'yz'), 2), 'ContentLength': 2},
+        ]
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key}, HTTP_RANGE='bytes=0-1,-2')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(b'Content-Range: bytes 0-1/100\r\n\r\nab', body)
+        self.assertIn(b'Content-Range: bytes 98-99/100\r\n\r\nyz', body)
+
+    @patch('objects.views.get_s3_client')
+    def test_download_conditional_and_unsatisfiable(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key}, HTTP_IF_NONE_MATCH='"test-key"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], '"test-key"')
+
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key}, HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+        mock_client.get_object.assert_not_called()
+
+    def test_parse_range_header(self):
+        self.assertIsNone(parse_range_header(None, 100))
+        self.assertIsNone(parse_range_header('bytes=5-1', 100))
+        self.assertIsNone(parse_range_header('items=0-1', 100))
+        self.assertEqual(parse_range_header('bytes=0-', 100), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=0-10,5-20,50-60', 100), [(0, 20), (50, 60)])
+        self.assertEqual(parse_range_header('bytes=100-200', 100), [])
+
+    @override_settings(OBJECT_DOWNLOAD_MODE='presigned')
+    @patch('objects.views.get_s3_client')
+    def test_download_presigned_url(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.generate_presigned_url.return_value = 'https://s3.test/test-key?sig'
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['url'], 'https://s3.test/test-key?sig')
+        mock_client.generate_presigned_url.assert_called_once_with(
+            'get_object',
+            Params={
+                'Bucket': 'djangowebstorage',
+                'Key': 'test-key',
+                'ResponseContentDisposition': 'attachment; filename="testfile.txt"',
+                'ResponseContentType': 'text/plain',
+            },
+            ExpiresIn=300
+        )
+        mock_client.get_object.assert_not_called()
+
+    @override_settings(OBJECT_DOWNLOAD_MODE='redirect')
+    @patch('objects.views.get_s3_client')
+    def test_download_redirect(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.generate_presigned_url.return_value = 'https://s3.test/test-key?sig'
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key})
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(response['Location'], 'https://s3.test/test-key?sig')
+
+    @override_settings(OBJECT_DOWNLOAD_MODE='redirect')
+    def test_redirect_mode_still_checks_permission(self):
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(
+            self.url, {'object_key': self.app_object.object_key})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(OBJECT_RENDITION_SIZES=[64, 256], OBJECT_RENDITION_FORMAT='webp')
+class RenditionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        self.image = AppObject.objects.create(
+            object_key='image-key', name='photo.png', owner=self.user, size=100,
+            mime_type='image/png', file_type='image')
+        self.url = reverse('preview-object')
+
+    def render_queue(self, render_result):
+        with patch('objects.renditions.get_s3_client') as mock_get_s3_client, \
+                patch('objects.renditions.render', side_effect=render_result) as mock_render, \
+                ThreadPoolExecutor(1) as executor:
+            mock_client = mock_get_s3_client.return_value
+            mock_client.get_object.return_value = {'Body': io.BytesIO(b'original')}
+            rendered = process_renditions(executor)
+        return rendered, mock_client, mock_render
+
+    def test_available_images_and_pdfs_are_queued(self):
+        AppObject.objects.create(object_key='text-key', name='a.txt', owner=self.user, size=1,
+                                 mime_type='text/plain', file_type='others')
+        pending = AppObject.objects.create(object_key='pdf-key', name='a.pdf', owner=self.user, size=1,
+                                           mime_type='application/pdf', file_type='pdf',
+                                           status=AppObject.Status.PENDING)
+        self.assertEqual(sorted(Rendition.objects.values_list('app_object_id', 'size')),
+                         [('image-key', 64), ('image-key', 256)])
+
+        pending.status = AppObject.Status.AVAILABLE
+        pending.save(update_fields=['status'])
+        self.assertEqual(Rendition.objects.filter(app_object=pending).count(), 2)
+
+    def test_claimed_renditions_are_not_claimed_again(self):
+        self.assertEqual(len(claim_batch(10)), 2)
+        self.assertEqual(claim_batch(10), [])
+
+        # Another worker leases a rendition after this one has read it
+        Rendition.objects.update(next_attempt_at=timezone.now())
+        stale = list(Rendition.objects.select_related('app_object__blob').order_by('pk'))
+        Rendition.objects.filter(pk=stale[0].pk).update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5))
+        with patch.object(Rendition.objects, 'select_for_update') as mock_select:
+            mock_select.return_value.filter.return_value.select_related.return_value \
+                .order_by.return_value.__getitem__.return_value = stale
+            self.assertEqual(claim_batch(10), [stale[1]])
+
+    def test_worker_stores_renditions(self):
+        rendered, mock_client, mock_render = self.render_queue(lambda *args: {64: b'small', 256: b'large'})
+
+        self.assertEqual(rendered, 2)
+        mock_render.assert_called_once_with(b'original', 'image', [64, 256], 'webp', 80)
+        mock_client.get_object.assert_called_once_with(Bucket='djangowebstorage', Key='image-key')
+        mock_client.put_object.assert_any_call(
+            ACL='private', Body=b'small', Bucket='djangowebstorage',
+            Key='renditions/image-key/64.webp', ContentType='image/webp')
+        rendition = Rendition.objects.get(app_object=self.image, size=256)
+        self.assertEqual((rendition.status, rendition.storage_key, rendition.bytes),
+                         (Rendition.Status.READY, 'renditions/image-key/256.webp', 5))
+
+    def test_worker_retries_failures_and_skips_large_originals(self):
+        AppObject.objects.create(object_key='huge-key', name='huge.png', owner=self.user, size=10 ** 12,
+                                 mime_type='image/png', file_type='image')
+        rendered, mock_client, mock_render = self.render_queue(OSError('cannot identify image file'))
+
+        self.assertEqual(rendered, 0)
+        mock_render.assert_called_once()
+        mock_client.put_object.assert_not_called()
+        for rendition in Rendition.objects.filter(app_object=self.image):
+            self.assertEqual((rendition.status, rendition.attempts), (Rendition.Status.PENDING, 1))
+            self.assertGreater(rendition.next_attempt_at, timezone.now())
+        self.assertFalse(Rendition.objects.filter(app_object_id='huge-key').exclude(
+            status=Rendition.Status.FAILED).exists())
+
+    @patch('objects.views.get_s3_client')
+    def test_preview(self, mock_get_s3_client):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'object_key': 'image-key'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['error'], "Preview not available.")
+
+        Rendition.objects.filter(app_object=self.image, size=64).update(
+            status=Rendition.Status.READY, storage_key='renditions/image-key/64.webp',
+            content_type='image/webp', bytes=5)
+        mock_get_s3_client.return_value.get_object.return_value = {
+            'Body': StreamingBody(io.BytesIO(b'small'), 5), 'ContentLength': 5}
+        response = self.client.get(self.url, {'object_key': 'image-key'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'small')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('max-age', response['Cache-Control'])
+
+        mock_get_s3_client.reset_mock()
+        response = self.client.get(self.url, {'object_key': 'image-key'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        mock_get_s3_client.return_value.get_object.assert_not_called()
+
+        response = self.client.get(self.url, {'object_key': 'image-key', 'size': 100})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_preview_requires_access(self):
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.url, {'object_key': 'image-key'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch('objects.views.get_s3_client')
+    def test_delete_removes_renditions(self, mock_get_s3_client):
+        Rendition.objects.filter(app_object=self.image).update(
+            status=Rendition.Status.READY, storage_key='renditions/image-key/64.webp')
+        mock_get_s3_client.return_value.delete_objects.return_value = {}
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(reverse('delete-object'), {'object_key': 'image-key'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Rendition.objects.exists())
+        deleted = mock_get_s3_client.return_value.delete_objects.call_args.kwargs['Delete']['Objects']
+        self.assertEqual(len(deleted), 2)
+
+    @skipUnless(thumbnails.can_render('image'), 'Pillow is not installed')
+    def test_render_image(self):
+        image = io.BytesIO()
+        thumbnails.Image.new('RGBA', (1000, 500), (255, 0, 0, 128)).save(image, format='PNG')
+        renditions = thumbnails.render(image.getvalue(), 'image', [64, 256], 'jpeg', 80)
+        self.assertEqual(thumbnails.Image.open(io.BytesIO(renditions[64])).size, (64, 32))
+        self.assertEqual(thumbnails.Image.open(io.BytesIO(renditions[256])).size, (256, 128))
+
+
+class AccessCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        self.app_object = AppObject.objects.create(
+            object_key='test-key', name='testfile.txt', owner=self.user, size=100,
+            mime_type='text/plain', file_type='others')
+        self.app_object.shared_with.add(self.other_user)
+
+    def test_decisions_are_cached(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(access.can_read(self.user, self.app_object))
+        with self.assertNumQueries(1):
+            self.assertTrue(access.can_read(self.other_user, self.app_object))
+        with self.assertNumQueries(0):
+            self.assertTrue(access.can_read(self.other_user, self.app_object))
+
+    def test_decisions_are_cached_per_reader(self):
+        readers = [User.objects.create_user(username=f'reader{i}', email=f'reader{i}@test.com',
+                                            password='pass') for i in range(3)]
+        self.app_object.shared_with.add(*readers[:2])
+        self.assertEqual([access.can_read(reader, self.app_object) for reader in readers],
+                         [True, True, False])
+        # Dropping the object's generation forgets every reader at once
+        access.forget([self.app_object.pk])
+        self.app_object.shared_with.remove(readers[0])
+        with self.assertNumQueries(2):
+            self.assertEqual([access.can_read(reader, self.app_object) for reader in readers[:2]],
+                             [False, True])
+
+    def test_sharing_changes_invalidate(self):
+        self.assertTrue(access.can_read(self.other_user, self.app_object))
+        self.app_object.shared_with.remove(self.other_user)
+        self.assertFalse(access.can_read(self.other_user, self.app_object))
+
+        self.client.force_authenticate(user=self.user)
+        self.client.put(reverse('update-access'), {
+            'object_key': 'test-key', 'shared_with': [self.other_user.id]}, format='json')
+        self.assertTrue(access.can_read(self.other_user, self.app_object))
+
+        self.client.post(reverse('bulk-update-access'), {
+            'object_keys': ['test-key'], 'user_ids': [self.other_user.id], 'action': 'revoke'}, format='json')
+        self.assertFalse(access.can_read(self.other_user, self.app_object))
+
+        self.other_user.shared_objects.add(self.app_object)
+        self.assertTrue(access.can_read(self.other_user, self.app_object))
+        self.other_user.shared_objects.clear()
+        self.assertFalse(access.can_read(self.other_user, self.app_object))
+
+    @patch('objects.views.get_s3_client')
+    def test_download_by_sharee_does_not_load_sharees(self, mock_get_s3_client):
+        mock_get_s3_client.return_value.get_object.return_value = {
+            'Body': StreamingBody(io.BytesIO(b'test content'), 12), 'ContentLength': 12}
+        self.client.force_authenticate(user=self.other_user)
+        url = reverse('download-object')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'object_key': 'test-key'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        share_queries = [query['sql'] for query in queries.captured_queries
+                         if 'objects_appobject_shared_with' in query['sql']]
+        self.assertEqual(len(share_queries), 1)
+        self.assertIn('LIMIT 1', share_queries[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'object_key': 'test-key'})
+        self.assertFalse(any('objects_appobject_shared_with' in query['sql']
+                             for query in queries.captured_queries))
+
 
 class ObjectListViewTests(TestCase):
     def setUp(self):
@@ -122,6 +1049,248 @@ class ObjectListViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def test_list_objects_cursor_pagination(self):
+        for i in range(3, 6):
+            AppObject.objects.create(
+                object_key=f'test-key-{i}', name=f'testfile{i}.txt', owner=self.user,
+                size=100, mime_type='text/plain', file_type='others')
+        # Identical timestamps must still page in a stable order
+        AppObject.objects.filter(object_key__in=['test-key-2', 'test-key-3']).update(
+            uploaded_at=timezone.now())
+        expected = list(AppObject.objects.order_by(
+            '-uploaded_at', '-object_key').values_list('object_key', flat=True))
+        self.client.force_authenticate(user=self.user)
+
+        keys = []
+        url = self.url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 5)
+            keys.extend(item['object_key'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(keys, expected)
+
+        response = self.client.get(self.url, {'page_size': 2, 'count': 'false'})
+        self.assertNotIn('count', response.data)
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['object_key'] for item in response.data['results']], expected[:2])
+        self.assertIsNone(response.data['previous'])
+
+    def test_list_merges_owned_and_shared_objects(self):
+        third_user = User.objects.create_user(username='thirduser', email='third@test.com', password='thirdpass')
+        for i in range(3, 7):
+            app_object = AppObject.objects.create(
+                object_key=f'test-key-{i}', name=f'testfile{i}.txt', owner=third_user,
+                size=100, mime_type='text/plain', file_type='others')
+            if i % 2:
+                app_object.shared_with.add(self.other_user)
+            else:
+                self.other_user.shared_objects.add(app_object)
+        AppObject.objects.create(
+            object_key='test-key-7', name='own.txt', owner=self.other_user,
+            size=100, mime_type='text/plain', file_type='others').shared_with.add(self.other_user)
+        self.assertFalse(AppObjectShare.objects.filter(object_uploaded_at__isnull=True).exists())
+
+        self.client.force_authenticate(user=self.other_user)
+        keys = []
+        url = self.url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 6)
+            keys.extend(item['object_key'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(keys, ['test-key-7', 'test-key-6', 'test-key-5', 'test-key-4', 'test-key-3', 'test-key-2'])
+
+    def test_list_query_count_is_constant(self):
+        for i in range(3, 13):
+            app_object = AppObject.objects.create(
+                object_key=f'test-key-{i}', name=f'testfile{i}.txt', owner=self.other_user,
+                size=100, mime_type='text/plain', file_type='others')
+            app_object.shared_with.add(self.user, self.other_user)
+        self.client.force_authenticate(user=self.user)
+
+        query_counts = []
+        for page_size in (2, 12):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        # count + owned branch + shared branch + shared_with prefetch
+        self.assertEqual(query_counts[1], 4)
+        shared = [item for item in response.data['results'] if not item['is_owner']]
+        self.assertEqual(sorted(shared[0]['shared_with']), [self.user.id, self.other_user.id])
+
+    def test_list_objects_invalid_cursor(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ObjectListFilterTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        now = timezone.now()
+        for i, (name, owner, size, mime_type, file_type) in enumerate([
+                ('b.png', self.user, 300, 'image/png', 'image'),
+                ('a.pdf', self.user, 100, 'application/pdf', 'pdf'),
+                ('d.jpg', self.other_user, 200, 'image/jpeg', 'image'),
+                ('c.txt', self.user, 400, 'text/plain', 'others')]):
+            app_object = AppObject.objects.create(object_key=f'key-{i}', name=name, owner=owner, size=size,
+                                                  mime_type=mime_type, file_type=file_type)
+            AppObject.objects.filter(pk=app_object.pk).update(uploaded_at=now - timedelta(days=i))
+        AppObject.objects.get(pk='key-2').shared_with.add(self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('list-objects')
+
+    def keys(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [obj['object_key'] for obj in response.data['results']]
+
+    def test_filters_apply_to_owned_and_shared_objects(self):
+        self.assertEqual(self.keys(file_type='image'), ['key-0', 'key-2'])
+        self.assertEqual(self.keys(mime='image/'), ['key-0', 'key-2'])
+        self.assertEqual(self.keys(min_size=150, max_size=300), ['key-0', 'key-2'])
+        self.assertEqual(self.keys(uploaded_after=timezone.now() - timedelta(days=2, hours=12),
+                                   uploaded_before=timezone.now() - timedelta(hours=12)),
+                         ['key-1', 'key-2'])
+        response = self.client.get(self.url, {'file_type': 'image', 'max_size': 250})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_ordering(self):
+        self.assertEqual(self.keys(ordering='name'), ['key-1', 'key-0', 'key-3', 'key-2'])
+        self.assertEqual(self.keys(ordering='-size'), ['key-3', 'key-0', 'key-2', 'key-1'])
+        self.assertEqual(self.keys(ordering='uploaded_at', file_type='image'), ['key-2', 'key-0'])
+
+        keys = []
+        url = self.url + '?ordering=size&page_size=1'
+        while url:
+            response = self.client.get(url)
+            keys.extend(obj['object_key'] for obj in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(keys, ['key-1', 'key-2', 'key-0', 'key-3'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([obj['object_key'] for obj in response.data['results']], ['key-0'])
+
+    def test_shared_copies_follow_the_object(self):
+        app_object = AppObject.objects.create(
+            object_key='pending', name='e.bin', owner=self.other_user, size=0,
+            mime_type='application/octet-stream', file_type='others', status=AppObject.Status.PENDING)
+        app_object.shared_with.add(self.user)
+        app_object.size = 500
+        app_object.status = AppObject.Status.AVAILABLE
+        app_object.save(update_fields=['size', 'status'])
+        self.assertEqual(self.keys(ordering='-size'), ['pending', 'key-3', 'key-0', 'key-2', 'key-1'])
+
+    def test_invalid_parameters(self):
+        for params in ({'ordering': 'mime_type'}, {'file_type': 'archive'}, {'min_size': -1},
+                       {'uploaded_after': 'yesterday'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        cursor = self.client.get(self.url, {'ordering': 'name', 'page_size': 1}).data['next']
+        response = self.client.get(cursor.replace('ordering=name', 'ordering=size'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('search-objects'), {'q': 'a', 'ordering': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_every_ordering_and_filter_is_served_by_an_index(self):
+        values = {'uploaded_at': timezone.now(), 'name': 'b', 'size': 100}
+        for ordering in ('-uploaded_at', 'uploaded_at', 'name', '-name', 'size', '-size'):
+            pagination = VisibleObjectsPagination()
+            pagination.ordering_field = ordering.lstrip('-')
+            pagination.descending = ordering.startswith('-')
+            field = pagination.ordering_field
+            for filters in ({}, {'file_type': 'image'}, {'size__gte': 1, 'size__lte': 10},
+                            {'mime_type__gte': 'image/', 'mime_type__lt': 'image0'},
+                            {'uploaded_at__gte': timezone.now()}):
+                visible = VisibleObjects(self.user, filters)
+                owned = pagination.seek(visible.owned(), values[field], 'key', True).order_by(
+                    *pagination.get_ordering(True))
+                shared = pagination.seek(
+                    visible.shared(), values[field], 'key', True,
+                    field=shared_field(field), key_field='app_object_id',
+                ).order_by(*pagination.get_ordering(True, field=shared_field(field), key_field='app_object_id'))
+                for queryset in (owned, shared):
+                    plan = queryset[:10].explain()
+                    with self.subTest(ordering=ordering, filters=filters, model=queryset.model):
+                        self.assertNotIn('SCAN', plan)
+                        if set(filters) <= {'file_type'}:
+                            # The type filter and the ordering share one index;
+                            # a range on another column is sorted after it
+                            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ObjectSearchViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        now = timezone.now()
+        for i, (name, owner) in enumerate([
+                ('Quarterly Report 2024.pdf', self.user),
+                ('report-draft.txt', self.user),
+                ('notes.txt', self.user),
+                ('Final_REPORT.docx', self.other_user),
+                ('report of someone else.txt', self.other_user)]):
+            app_object = AppObject.objects.create(object_key=f'key-{i}', name=name, owner=owner, size=1,
+                                                  mime_type='text/plain', file_type='others')
+            AppObject.objects.filter(pk=app_object.pk).update(uploaded_at=now - timedelta(minutes=i))
+            SearchToken.objects.filter(app_object=app_object).update(
+                object_uploaded_at=now - timedelta(minutes=i))
+        AppObject.objects.get(pk='key-3').shared_with.add(self.user)
+        AppObject.objects.create(object_key='pending', name='report pending.txt', owner=self.user, size=1,
+                                 mime_type='text/plain', file_type='others', status=AppObject.Status.PENDING)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('search-objects')
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_prefix_and_case_insensitive_matching(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.search('REP')
+        self.assertEqual([obj['object_key'] for obj in response.data['results']],
+                         ['key-0', 'key-1', 'key-3'])
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries.captured_queries))
+
+        response = self.search('report 2024')
+        self.assertEqual([obj['object_key'] for obj in response.data['results']], ['key-0'])
+        response = self.search('port')
+        self.assertEqual(response.data['results'], [])
+
+    def test_cursor_pagination(self):
+        response = self.search('report', page_size=2)
+        self.assertEqual([obj['object_key'] for obj in response.data['results']], ['key-0', 'key-1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([obj['object_key'] for obj in response.data['results']], ['key-3'])
+        self.assertIsNone(response.data['next'])
+
+    def test_index_follows_sharing(self):
+        self.client.force_authenticate(user=self.other_user)
+        self.client.post(reverse('bulk-update-access'), {
+            'object_keys': ['key-3'], 'user_ids': [self.user.id], 'action': 'revoke'}, format='json')
+        self.client.force_authenticate(user=self.user)
+        response = self.search('final')
+        self.assertEqual(response.data['results'], [])
+
+        AppObject.objects.get(pk='key-4').shared_with.add(self.user)
+        response = self.search('someone')
+        self.assertEqual([obj['object_key'] for obj in response.data['results']], ['key-4'])
+
+    def test_missing_query(self):
+        response = self.client.get(self.url, {'q': ' -_ '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class DeleteObjectViewTests(TestCase):
 
     def setUp(self):
@@ -164,36 +1333,88 @@ class DeleteObjectViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(response.data['error'], "You do not have permission to access this object.")
 
-    @patch('boto3.resource')
-    def test_successful_delete_owner(self, mock_boto3_resource):
+    @patch('objects.views.get_s3_client')
+    def test_successful_delete_owner(self, mock_get_s3_client):
         self.client.force_authenticate(user=self.user)
         
-        mock_s3_resource = MagicMock()
-        mock_boto3_resource.return_value = mock_s3_resource
-        mock_bucket = MagicMock()
-        mock_s3_resource.Bucket.return_value = mock_bucket
+        mock_client = mock_get_s3_client.return_value
 
         response = self.client.delete(self.url, {'object_key': self.app_object.object_key})
 
-        mock_bucket.Object.return_value.delete.assert_called_once_with()
+        mock_client.delete_object.assert_called_once_with(
+            Bucket='djangowebstorage', Key='test-key')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['message'], "Object deleted successfully.")
 
-    @patch('boto3.resource')
-    def test_object_not_found_in_database(self, mock_boto3_resource):
+    @patch('objects.views.get_s3_client')
+    def test_object_not_found_in_database(self, mock_get_s3_client):
         self.client.force_authenticate(user=self.user)
         
         AppObject.objects.filter(object_key=self.app_object.object_key).delete()
 
-        mock_s3_resource = MagicMock()
-        mock_boto3_resource.return_value = mock_s3_resource
-        mock_bucket = MagicMock()
-        mock_s3_resource.Bucket.return_value = mock_bucket
+        mock_client = mock_get_s3_client.return_value
 
         response = self.client.delete(self.url, {'object_key': self.app_object.object_key})
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data['error'], "Object not found in the database.")
+class BulkDeleteObjectsViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        for key, owner in [('key-a', self.user), ('key-b', self.user), ('key-c', self.other_user)]:
+            AppObject.objects.create(object_key=key, name=f'{key}.txt', owner=owner, size=1,
+                                     mime_type='text/plain', file_type='others')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('bulk-delete-objects')
+
+    @patch('objects.views.get_s3_client')
+    def test_bulk_delete(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.delete_objects.return_value = {
+            'Errors': [{'Key': 'key-b', 'Code': 'InternalError'}]}
+
+        response = self.client.delete(
+            self.url, {'object_keys': ['key-a', 'key-b', 'key-c', 'key-d']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        mock_client.delete_objects.assert_called_once_with(
+            Bucket='djangowebstorage',
+            Delete={'Objects': [{'Key': 'key-a'}, {'Key': 'key-b'}], 'Quiet': True})
+        self.assertEqual(response.data['results'], [
+            {'object_key': 'key-a', 'status': 'deleted'},
+            {'object_key': 'key-b', 'status': 'failed', 'error': 'Storage error: InternalError.'},
+            {'object_key': 'key-c', 'status': 'failed',
+             'error': 'You do not have permission to access this object.'},
+            {'object_key': 'key-d', 'status': 'failed', 'error': 'Object not found in the database.'},
+        ])
+        self.assertEqual(sorted(AppObject.objects.values_list('object_key', flat=True)),
+                         ['key-b', 'key-c'])
+
+    @patch('objects.views.get_s3_client')
+    def test_bulk_delete_batches_keys(self, mock_get_s3_client):
+        mock_client = mock_get_s3_client.return_value
+        mock_client.delete_objects.return_value = {}
+        AppObject.objects.bulk_create(
+            AppObject(object_key=f'bulk-{i}', name='f.txt', owner=self.user, size=1,
+                      mime_type='text/plain', file_type='others') for i in range(2500))
+        keys = [f'bulk-{i}' for i in range(2500)]
+
+        response = self.client.delete(self.url, {'object_keys': keys}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        batch_sizes = [len(call.kwargs['Delete']['Objects'])
+                       for call in mock_client.delete_objects.call_args_list]
+        self.assertEqual(batch_sizes, [1000, 1000, 500])
+        self.assertFalse(AppObject.objects.filter(object_key__startswith='bulk-').exists())
+
+    def test_bulk_delete_requires_keys(self):
+        response = self.client.delete(self.url, {'object_keys': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class AccessUpdateViewTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -209,8 +1430,7 @@ class AccessUpdateViewTests(TestCase):
         )
         self.url = reverse('update-access')
 
-    @patch('django.core.mail.send_mail')
-    def test_update_access(self, mock_send_mail):
+    def test_update_access(self):
         self.client.force_authenticate(user=self.user)
         response = self.client.put(self.url, {
             'object_key': self.app_object.object_key,
@@ -219,6 +1439,73 @@ class AccessUpdateViewTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['message'], "Access updated successfully.")
+        # Queued for the send_outbox worker, not sent within the request
+        self.assertEqual(len(mail.outbox), 0)
+        shared_emails = OutgoingEmail.objects.filter(subject='File Shared with You')
+        self.assertEqual(list(shared_emails.values_list('to', flat=True)), ['other@test.com'])
+
+
+class BulkAccessUpdateViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass')
+        self.team = [User.objects.create_user(username=f'member{i}', email=f'member{i}@test.com',
+                                              password='pass') for i in range(3)]
+        self.other_user = User.objects.create_user(username='otheruser', email='other@test.com', password='otherpass')
+        self.keys = [f'project-{i}' for i in range(5)]
+        for key in self.keys:
+            AppObject.objects.create(object_key=key, name=f'{key}.txt', owner=self.user, size=1,
+                                     mime_type='text/plain', file_type='others')
+        AppObject.objects.create(object_key='foreign', name='foreign.txt', owner=self.other_user,
+                                 size=1, mime_type='text/plain', file_type='others')
+        AppObject.objects.get(object_key='project-0').shared_with.add(self.team[0])
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('bulk-update-access')
+
+    def test_bulk_grant(self):
+        user_ids = [member.id for member in self.team]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'object_keys': self.keys + ['foreign'], 'user_ids': user_ids, 'action': 'grant'},
+                format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['granted'] * 5 + ['failed'])
+        self.assertEqual(AppObjectShare.objects.filter(app_object_id__in=self.keys).count(), 15)
+        self.assertFalse(AppObjectShare.objects.filter(app_object_id='foreign').exists())
+        self.assertFalse(AppObjectShare.objects.filter(object_uploaded_at__isnull=True).exists())
+        inserts = [q for q in queries.captured_queries
+                   if q['sql'].startswith('INSERT') and 'shared_with' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+
+        # One email per user, for the files they did not have yet
+        emails = dict(OutgoingEmail.objects.filter(
+            subject='Files Shared with You').values_list('to', 'body'))
+        self.assertEqual(sorted(emails), ['member0@test.com', 'member1@test.com', 'member2@test.com'])
+        self.assertTrue(emails['member0@test.com'].startswith('4 file(s)'))
+        self.assertTrue(emails['member1@test.com'].startswith('5 file(s)'))
+
+    def test_bulk_revoke(self):
+        response = self.client.post(self.url, {
+            'object_keys': self.keys, 'user_ids': [self.team[0].id], 'action': 'revoke'},
+            format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(AppObjectShare.objects.exists())
+
+    def test_unknown_user(self):
+        response = self.client.post(self.url, {
+            'object_keys': self.keys, 'user_ids': [999999], 'action': 'grant'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_too_many_pairs(self):
+        with override_settings(OBJECT_BULK_ACCESS_MAX_PAIRS=len(self.keys)):
+            response = self.client.post(self.url, {
+                'object_keys': self.keys, 'user_ids': [member.id for member in self.team[1:]],
+                'action': 'grant'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(AppObjectShare.objects.count(), 1)
 
 
 class UsersAccessViewTests(TestCase):
@@ -242,10 +1529,26 @@ class UsersAccessViewTests(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get(self.url, {'object_key': self.app_object.object_key})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        for user_data in response.data:
+        self.assertEqual(len(response.data['results']), 2)
+        for user_data in response.data['results']:
             if user_data['username'] == 'testuser':
                 self.assertTrue(user_data['is_owner'])
             else:
                 self.assertFalse(user_data['is_owner'])
                 self.assertTrue(user_data['has_access'])
+
+    def test_users_access_prefix_search(self):
+        User.objects.create_user(username='Otto', email='otto@test.com', password='ottopass')
+        User.objects.create_user(username='bob', email='OTHER.bob@test.com', password='bobpass')
+        self.client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url, {'object_key': self.app_object.object_key, 'q': 'OT'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([user['username'] for user in response.data['results']],
+                         ['bob', 'otheruser', 'Otto'])
+        self.assertEqual([user['has_access'] for user in response.data['results']],
+                         [False, True, False])
+        # object lookup + count + one annotated page query
+        self.assertEqual(len(queries), 3)
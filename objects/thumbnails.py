@@ -0,0 +1,61 @@
+"""
+Rendering of previews. Runs in the worker processes of
+``process_renditions``, so it only works on bytes and does not touch Django.
+"""
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def can_render(file_type):
+    if Image is None:
+        return False
+    return file_type == 'image' or (file_type == 'pdf' and fitz is not None)
+
+
+def open_first_page(data, size):
+    # Rasterized just large enough for the biggest rendition
+    with fitz.open(stream=data, filetype='pdf') as document:
+        page = document[0]
+        zoom = size / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def render(data, file_type, sizes, image_format, quality):
+    """
+    Returns ``{size: bytes}`` with the image, or the first page of the PDF,
+    in ``data`` scaled down to fit each ``size`` x ``size`` box.
+    """
+    if not can_render(file_type):
+        raise RuntimeError(f'Cannot render {file_type} files without Pillow and PyMuPDF.')
+
+    if file_type == 'pdf':
+        image = open_first_page(data, max(sizes))
+    else:
+        image = Image.open(io.BytesIO(data))
+        image.draft('RGB', (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+    if image_format == 'jpeg' or image.mode not in ('RGB', 'RGBA'):
+        # JPEG has no alpha channel; WebP keeps transparency
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if image_format == 'webp' and transparent else 'RGB')
+
+    renditions = {}
+    # Each size is scaled from the previous, larger one
+    for size in sorted(sizes, reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=image_format.upper(), quality=quality)
+        renditions[size] = output.getvalue()
+    return renditions
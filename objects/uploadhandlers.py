@@ -0,0 +1,166 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+
+from .blobs import find_blob
+from .storage import get_s3_client
+
+
+class S3UploadedFile(UploadedFile):
+    """
+    An uploaded file whose bytes were already written to S3 under
+    ``object_key``, or not written at all (``stored`` is false) because the
+    same content is stored already.
+    """
+
+    def __init__(self, object_key, stored, sha256, name, content_type, size, charset,
+                 content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.object_key = object_key
+        self.stored = stored
+        self.sha256 = sha256
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """
+    Streams one file field of a multipart request straight into an S3
+    multipart upload while the request body is being parsed.
+
+    At most one part is held in memory, nothing is written to local disk, and
+    the size and SHA-256 of the file are computed on the fly. Other fields
+    are passed on to the next handlers untouched.
+
+    Content that is already stored is not written again: a file that fits
+    in one part is hashed before anything is sent, and a client can declare
+    the hash of a larger file up front in the ``X-Content-SHA256`` header.
+
+    A file larger than ``max_size`` stops the upload as soon as the excess
+    arrives and sets ``size_exceeded``.
+    """
+
+    def __init__(self, request=None, field_name='object', max_size=None):
+        super().__init__(request)
+        self.field_name = field_name
+        self.max_size = max_size
+        self.size_exceeded = False
+        self.part_size = settings.OBJECT_MULTIPART_PART_SIZE
+        self.active = False
+        self.started = False
+        self.upload_id = None
+        self.state = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        # Only the first file sent under the field is taken
+        self.active = field_name == self.field_name and not self.started
+        if not self.active:
+            return
+
+        self.started = True
+        self.s3_client = get_s3_client()
+        self.object_key = str(uuid4())
+        self.buffer = bytearray()
+        self.parts = []
+        self.sha256 = hashlib.sha256()
+        self.declared_sha256 = self.request.META.get('HTTP_X_CONTENT_SHA256', '').lower()
+        # The bytes of known content are only hashed, to verify the claim
+        self.known_blob = self.declared_sha256 and find_blob(self.declared_sha256)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if self.max_size is not None and start + len(raw_data) > self.max_size:
+            self.size_exceeded = True
+            self.abort()
+            raise StopUpload(connection_reset=True)
+
+        self.sha256.update(raw_data)
+        if self.known_blob:
+            return None
+        self.buffer += raw_data
+        while len(self.buffer) >= self.part_size:
+            self.upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return None
+
+    def upload_part(self, data):
+        if self.upload_id is None:
+            # Files smaller than one part never open a multipart upload
+            self.upload_id = self.s3_client.create_multipart_upload(
+                ACL='private',
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=self.object_key
+            )['UploadId']
+            self.state = 'uploading'
+        part_number = len(self.parts) + 1
+        result = self.s3_client.upload_part(
+            Bucket=settings.ARVAN_BUCKET_NAME,
+            Key=self.object_key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        self.parts.append({'ETag': result['ETag'], 'PartNumber': part_number})
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+
+        sha256 = self.sha256.hexdigest()
+        if self.upload_id is not None:
+            if self.buffer:
+                self.upload_part(bytes(self.buffer))
+            self.s3_client.complete_multipart_upload(
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=self.object_key,
+                UploadId=self.upload_id,
+                MultipartUpload={'Parts': self.parts}
+            )
+            self.state = 'completed'
+        elif not self.known_blob and not find_blob(sha256):
+            # The whole file is in the buffer, so its hash is known already
+            self.s3_client.put_object(
+                ACL='private', Body=bytes(self.buffer), Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=self.object_key)
+            self.state = 'completed'
+        self.buffer = bytearray()
+
+        return S3UploadedFile(
+            object_key=self.object_key,
+            stored=self.state == 'completed',
+            sha256=sha256,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra
+        )
+
+    def upload_interrupted(self):
+        self.abort()
+
+    def abort(self):
+        """Discards the parts sent so far, e.g. when the client disconnects."""
+        if self.state != 'uploading':
+            return
+        self.state = 'aborted'
+        self.s3_client.abort_multipart_upload(
+            Bucket=settings.ARVAN_BUCKET_NAME,
+            Key=self.object_key,
+            UploadId=self.upload_id
+        )
+
+    def discard(self):
+        """Removes whatever this handler wrote to S3, finished or not."""
+        if self.state == 'completed':
+            self.state = 'aborted'
+            self.s3_client.delete_object(
+                Bucket=settings.ARVAN_BUCKET_NAME, Key=self.object_key)
+        else:
+            self.abort()
@@ -3,9 +3,30 @@ from . import views
 
 urlpatterns = [
     path("upload/", views.UploadObjectView.as_view(), name="upload-object"),
+    path("upload/batch/", views.BatchUploadObjectView.as_view(),
+         name="batch-upload"),
+    path("upload/presigned/", views.PresignedUploadView.as_view(),
+         name="presigned-upload"),
+    path("upload/complete/", views.CompleteUploadView.as_view(),
+         name="complete-upload"),
+    path("multipart/initiate/", views.InitiateMultipartUploadView.as_view(),
+         name="multipart-initiate"),
+    path("multipart/parts/", views.MultipartUploadPartsView.as_view(),
+         name="multipart-parts"),
+    path("multipart/complete/", views.CompleteMultipartUploadView.as_view(),
+         name="multipart-complete"),
+    path("multipart/abort/", views.AbortMultipartUploadView.as_view(),
+         name="multipart-abort"),
     path("download/", views.DownloadObjectView.as_view(), name="download-object"),
+    path("preview/", views.ObjectPreviewView.as_view(), name="preview-object"),
     path("list/", views.ObjectListView.as_view(), name="list-objects"),
+    path("search/", views.ObjectSearchView.as_view(), name="search-objects"),
     path("delete/", views.DeleteObject.as_view(), name="delete-object"),
+    path("delete/bulk/", views.BulkDeleteObjectsView.as_view(),
+         name="bulk-delete-objects"),
     path("access/", views.AccessUpdateView.as_view(), name="update-access"),
-    path("people/", views.UsersAccessView.as_view(), name="people-shared")
+    path("access/bulk/", views.BulkAccessUpdateView.as_view(),
+         name="bulk-update-access"),
+    path("people/", views.UsersAccessView.as_view(), name="people-shared"),
+    path("stats/", views.StatsView.as_view(), name="storage-stats"),
 ]
@@ -1,20 +1,40 @@
-import boto3
 from botocore.exceptions import ClientError
 
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 from uuid import uuid4
-import os
-import tempfile
+import logging
+import math
 import mimetypes
 
 from django.conf import settings
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from django.http import FileResponse
-from django.core.mail import send_mail
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Prefetch, Q, prefetch_related_objects
+from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse, HttpResponseRedirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
 
-from .models import AppObject
-from .serializers import AppObjectSerializer, AccessUpdateSerializer
+from outbox.mail import enqueue_mail, enqueue_mails
+from outbox.models import OutgoingEmail
 
-from user.serializers import UserSerializer
+from .access import can_read, forget
+from .blobs import acquire_blobs, hash_file, purge_blobs, release_blobs
+from .models import AppObject, Blob, AppObjectShare, MultipartUpload, MultipartUploadPart, Rendition
+from .pagination import SearchPagination, VisibleObjectsPagination
+from .quotas import QuotaExceeded, release, remaining_quota, reserve, resize
+from .queries import VisibleObjects
+from .renditions import queue_renditions, rendition_keys
+from .ranges import MultipartByteranges, if_range_passes, parse_range_header
+from .search import NameSearch, index_objects, index_shares, tokenize, unindex_shares
+from .stats import record_deletes, record_uploads, summarize
+from .storage import delete_keys, get_s3_client
+from .uploadhandlers import S3MultipartUploadHandler
+from .serializers import AppObjectSerializer, AccessUpdateSerializer, PresignedUploadSerializer, MultipartPartUrlsSerializer, UserAccessSerializer, BulkDeleteSerializer, BulkAccessUpdateSerializer, ObjectListFilterSerializer
 
 from rest_framework import status, generics
 from rest_framework.views import APIView
@@ -26,74 +46,600 @@ from rest_framework.exceptions import PermissionDenied
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+
+def detect_file_type(name):
+    # Get the MIME type
+    mime_type, _ = mimetypes.guess_type(name)
+    if mime_type is None:
+        mime_type = 'application/octet-stream'  # Default MIME type if not detected
+
+    # Determine file type based on MIME type or file extension
+    file_extension = name.split('.')[-1].lower()
+    if mime_type.startswith('audio/'):
+        file_type = 'music'
+    elif mime_type == 'application/pdf':
+        file_type = 'pdf'
+    elif mime_type.startswith('video/'):
+        file_type = 'video'
+    elif mime_type.startswith('image/') or file_extension in ['png', 'jpeg', 'jpg']:
+        file_type = 'image'
+    else:
+        file_type = 'others'
+
+    return mime_type, file_type
 
-def get_s3_resource():
-    try:
-        return boto3.resource(
-            's3',
-            endpoint_url=settings.ARVAN_ENDPOINT,
-            aws_access_key_id=settings.ARVAN_ACCESS_KEY,
-            aws_secret_access_key=settings.ARVAN_SECRET_KEY
-        )
 
-    except Exception as exc:
-        raise exc
+def get_content_type(app_object):
+    # Rows created before MIME detection was added carry 'N/A'
+    if '/' not in app_object.mime_type:
+        return 'application/octet-stream'
+    return app_object.mime_type
+
+
+def iter_s3_body(body, chunk_size):
+    # Closing the generator (client gone, response finished) releases the
+    # underlying HTTP connection back to the pool.
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
 
 
 class UploadObjectView(APIView):
     parser_classes = (MultiPartParser, )
+    throttle_scope = 'upload'
     permission_classes = [IsAuthenticated]
 
     def put(self, request):
-        print("request.user", request.user)
-        s3_resource = get_s3_resource()
+        # The file is written to S3 part by part while the body is parsed,
+        # and the upload stops once it outgrows the user's remaining quota.
+        upload_handler = S3MultipartUploadHandler(
+            request, max_size=remaining_quota(request.user.id))
+        request.upload_handlers = [upload_handler, *request.upload_handlers]
         try:
-            bucket = s3_resource.Bucket('djangowebstorage')
-            in_memory_file = request.FILES.get('object', None)
+            uploaded_file = request.FILES.get('object', None)
+
+            if upload_handler.size_exceeded:
+                return Response({"error": "Storage quota exceeded."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
 
-            if in_memory_file is None:
+            if uploaded_file is None:
                 return Response({"message": "No file found."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get the MIME type
-            mime_type, _ = mimetypes.guess_type(in_memory_file.name)
-            if mime_type is None:
-                mime_type = 'application/octet-stream'  # Default MIME type if not detected
-
-            # Determine file type based on MIME type or file extension
-            file_extension = in_memory_file.name.split('.')[-1].lower()
-            if mime_type.startswith('audio/'):
-                file_type = 'music'
-            elif mime_type == 'application/pdf':
-                file_type = 'pdf'
-            elif mime_type.startswith('video/'):
-                file_type = 'video'
-            elif mime_type.startswith('image/') or file_extension in ['png', 'jpeg', 'jpg']:
-                file_type = 'image'
-            else:
-                file_type = 'others'
-
-            object_instance = AppObject(object_key=str(uuid4()),
-                                        name=in_memory_file.name,
-                                        owner=request.user,
-                                        size=in_memory_file.size,
-                                        mime_type=mime_type,
-                                        file_type=file_type
-                                        )
-            object_instance.save()
-
-            bucket.put_object(
+            declared_sha256 = request.headers.get('X-Content-SHA256')
+            if declared_sha256 and declared_sha256.lower() != uploaded_file.sha256:
+                upload_handler.discard()
+                return Response({"error": "Content does not match X-Content-SHA256."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            mime_type, file_type = detect_file_type(uploaded_file.name)
+
+            with transaction.atomic():
+                reserve(request.user.id, [(file_type, uploaded_file.size)])
+                blobs, duplicate_keys = acquire_blobs([(
+                    uploaded_file.sha256, uploaded_file.size,
+                    uploaded_file.object_key if uploaded_file.stored else None)])
+                if uploaded_file.sha256 not in blobs:
+                    transaction.set_rollback(True)
+                    return Response({"error": "The stored content was removed during the upload. Please retry."},
+                                    status=status.HTTP_409_CONFLICT)
+
+                object_instance = AppObject(object_key=uploaded_file.object_key,
+                                            name=uploaded_file.name,
+                                            owner=request.user,
+                                            size=uploaded_file.size,
+                                            mime_type=mime_type,
+                                            file_type=file_type,
+                                            blob=blobs[uploaded_file.sha256]
+                                            )
+                object_instance.save()
+                record_uploads([object_instance])
+
+        except QuotaExceeded:
+            # Another upload took the remaining quota meanwhile
+            upload_handler.discard()
+            return Response({"error": "Storage quota exceeded."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except Exception:
+            # Client disconnects and S3 errors surface here mid-body
+            upload_handler.discard()
+            raise
+
+        if duplicate_keys:
+            # Identical content was stored by a concurrent upload
+            delete_keys(get_s3_client(), duplicate_keys)
+
+        return Response({"message": "Object uploaded successfully.",
+                         "object_key": object_instance.object_key,
+                         "size": object_instance.size,
+                         "sha256": uploaded_file.sha256},
+                        status=status.HTTP_201_CREATED)
+
+
+class BatchUploadObjectView(APIView):
+    """
+    Uploads every file sent under ``objects`` in one request.
+
+    The files are hashed first, so content that is already stored, or that
+    repeats within the batch, is sent to S3 only once. The rest is written
+    concurrently and the rows of the files that made it are inserted with a
+    single query. Each file gets an entry in ``results``; the response is a
+    207 when some of them failed.
+    """
+    parser_classes = (MultiPartParser, )
+    throttle_scope = 'upload'
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        uploaded_files = request.FILES.getlist('objects')
+        if not uploaded_files:
+            return Response({"message": "No file found."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Reserved up front so an over-quota batch sends nothing to S3
+        detected = [detect_file_type(uploaded_file.name) for uploaded_file in uploaded_files]
+        file_types = [file_type for _, file_type in detected]
+        try:
+            reserve(request.user.id, [(file_type, uploaded_file.size)
+                                      for uploaded_file, file_type in zip(uploaded_files, file_types)])
+        except QuotaExceeded:
+            return Response({"error": "Storage quota exceeded."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        s3_client = get_s3_client()
+        object_keys = [str(uuid4()) for _ in uploaded_files]
+
+        def put(i):
+            s3_client.put_object(
                 ACL='private',
-                Body=in_memory_file,
-                Key=object_instance.object_key
+                Body=uploaded_files[i],
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=object_keys[i]
+            )
+
+        stored = {}
+        errors = {}
+        results = []
+        objects = []
+        failed = []
+        try:
+            hashes = [hash_file(uploaded_file) for uploaded_file in uploaded_files]
+            known = set(Blob.objects.filter(sha256__in=hashes).values_list('sha256', flat=True))
+            to_store = {}
+            for i, sha256 in enumerate(hashes):
+                if sha256 not in known:
+                    to_store.setdefault(sha256, i)
+
+            if to_store:
+                workers = min(settings.OBJECT_BATCH_UPLOAD_CONCURRENCY, len(to_store))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {sha256: executor.submit(put, i) for sha256, i in to_store.items()}
+                for sha256, future in futures.items():
+                    try:
+                        future.result()
+                    except ClientError as e:
+                        errors[sha256] = f"Storage error: {e.response['Error'].get('Code')}."
+                    except Exception as e:
+                        # Connection errors and unreadable temporary files
+                        # fail only the file they happened to
+                        errors[sha256] = f"Storage error: {type(e).__name__}."
+                    else:
+                        stored[sha256] = object_keys[to_store[sha256]]
+
+            with transaction.atomic():
+                blobs, duplicate_keys = acquire_blobs(
+                    (sha256, uploaded_file.size, stored.get(sha256))
+                    for uploaded_file, sha256 in zip(uploaded_files, hashes) if sha256 not in errors)
+
+                for uploaded_file, sha256, object_key, (mime_type, file_type) in zip(
+                        uploaded_files, hashes, object_keys, detected):
+                    if sha256 not in errors and sha256 not in blobs:
+                        errors[sha256] = "The stored content was removed during the upload. Please retry."
+                    if sha256 in errors:
+                        results.append({"name": uploaded_file.name, "status": "failed",
+                                        "error": errors[sha256]})
+                        failed.append((request.user.id, file_type, uploaded_file.size))
+                        continue
+
+                    objects.append(AppObject(object_key=object_key,
+                                             name=uploaded_file.name,
+                                             owner=request.user,
+                                             size=uploaded_file.size,
+                                             mime_type=mime_type,
+                                             file_type=file_type,
+                                             blob=blobs[sha256]))
+                    results.append({"name": uploaded_file.name, "status": "uploaded",
+                                    "object_key": object_key, "size": uploaded_file.size,
+                                    "sha256": sha256})
+
+                AppObject.objects.bulk_create(objects)
+                record_uploads(objects)
+                index_objects(objects)
+                queue_renditions(objects)
+                release(failed)
+        except Exception:
+            # Without their rows the stored objects would never be reachable
+            delete_keys(s3_client, stored.values())
+            release((request.user.id, file_type, uploaded_file.size)
+                    for uploaded_file, file_type in zip(uploaded_files, file_types))
+            raise
+
+        if duplicate_keys:
+            delete_keys(s3_client, duplicate_keys)
+
+        response_status = status.HTTP_201_CREATED
+        if len(objects) < len(uploaded_files):
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
+
+
+class PresignedUploadView(APIView):
+    throttle_scope = 'upload'
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = PresignedUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        name = serializer.validated_data['name']
+        size = serializer.validated_data['size']
+        mime_type, file_type = detect_file_type(name)
+
+        # The reservation and the pending row commit together, so a failure
+        # in between leaves no bytes reserved for an upload that cannot finish
+        expires_in = settings.OBJECT_PRESIGNED_URL_EXPIRY
+        try:
+            with transaction.atomic():
+                reserve(request.user.id, [(file_type, size)])
+
+                # The row stays pending (invisible to listings and downloads)
+                # until the client reports the upload as finished.
+                object_instance = AppObject.objects.create(object_key=str(uuid4()),
+                                                           name=name,
+                                                           owner=request.user,
+                                                           size=size,
+                                                           mime_type=mime_type,
+                                                           file_type=file_type,
+                                                           status=AppObject.Status.PENDING
+                                                           )
+
+                # Signing is local, no request is sent to S3
+                presigned_post = get_s3_client().generate_presigned_post(
+                    Bucket=settings.ARVAN_BUCKET_NAME,
+                    Key=object_instance.object_key,
+                    Fields={'acl': 'private', 'Content-Type': mime_type},
+                    Conditions=[
+                        {'acl': 'private'},
+                        {'Content-Type': mime_type},
+                        ['content-length-range', 0, size],
+                    ],
+                    ExpiresIn=expires_in
+                )
+        except QuotaExceeded:
+            return Response({"error": "Storage quota exceeded."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response({
+            "object_key": object_instance.object_key,
+            "url": presigned_post['url'],
+            "fields": presigned_post['fields'],
+            "expires_in": expires_in,
+        }, status=status.HTTP_201_CREATED)
+
+
+def complete_pending_upload(app_object, size):
+    """
+    Makes a pending upload available with its final ``size``, inside the
+    caller's transaction. The row is claimed with an UPDATE conditional on
+    it still being pending, so a retried or concurrent completion returns
+    ``False`` instead of counting the upload twice.
+    """
+    claimed = AppObject.objects.filter(
+        pk=app_object.pk, status=AppObject.Status.PENDING).update(status=AppObject.Status.AVAILABLE)
+    if not claimed:
+        return False
+
+    resize(app_object.owner_id, app_object.file_type, size - app_object.size)
+    app_object.size = size
+    app_object.status = AppObject.Status.AVAILABLE
+    app_object.uploaded_at = timezone.now()
+    app_object.save(update_fields=['size', 'status', 'uploaded_at'])
+    record_uploads([app_object])
+    return True
+
+
+class CompleteUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        object_key = request.data.get('object_key')
+
+        if not object_key:
+            return Response({"error": "Object key not provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            app_object = AppObject.objects.get(object_key=object_key)
+        except AppObject.DoesNotExist:
+            return Response({"error": "Object not found in the database."}, status=status.HTTP_404_NOT_FOUND)
+
+        if app_object.owner != request.user:
+            return Response({"error": "You do not have permission to access this object."}, status=status.HTTP_403_FORBIDDEN)
+
+        if app_object.status == AppObject.Status.PENDING:
+            try:
+                head = get_s3_client().head_object(
+                    Bucket=settings.ARVAN_BUCKET_NAME, Key=object_key)
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                    return Response({"error": "Object has not been uploaded yet."}, status=status.HTTP_400_BAD_REQUEST)
+                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            with transaction.atomic():
+                completed = complete_pending_upload(app_object, head['ContentLength'])
+            if not completed:
+                # A concurrent completion won, or the upload expired meanwhile
+                app_object = AppObject.objects.filter(object_key=object_key).first()
+                if app_object is None:
+                    return Response({"error": "Object not found in the database."}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = AppObjectSerializer(app_object, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+def sync_multipart_parts(s3_client, upload):
+    """Records the parts S3 has received so far for ``upload``."""
+    parts = []
+    kwargs = {
+        'Bucket': settings.ARVAN_BUCKET_NAME,
+        'Key': upload.app_object_id,
+        'UploadId': upload.upload_id,
+    }
+    while True:
+        result = s3_client.list_parts(**kwargs)
+        parts.extend(MultipartUploadPart(upload=upload,
+                                         part_number=part['PartNumber'],
+                                         etag=part['ETag'],
+                                         size=part['Size'])
+                     for part in result.get('Parts', []))
+        if not result.get('IsTruncated'):
+            break
+        kwargs['PartNumberMarker'] = result['NextPartNumberMarker']
+
+    MultipartUploadPart.objects.bulk_create(
+        parts, update_conflicts=True, unique_fields=['upload', 'part_number'],
+        update_fields=['etag', 'size'])
+    return sorted(parts, key=lambda part: part.part_number)
+
+
+def abort_multipart_uploads(s3_client, object_keys):
+    """
+    Aborts the open multipart uploads of ``object_keys``, so S3 stops
+    keeping their parts, and returns a ``{key: error_code}`` dict of the
+    uploads that could not be aborted.
+    """
+    errors = {}
+    uploads = MultipartUpload.objects.filter(
+        app_object_id__in=object_keys).values_list('app_object_id', 'upload_id')
+    for object_key, upload_id in uploads:
+        try:
+            s3_client.abort_multipart_upload(
+                Bucket=settings.ARVAN_BUCKET_NAME, Key=object_key, UploadId=upload_id)
+        except ClientError as e:
+            code = e.response['Error'].get('Code', 'Unknown')
+            if code != 'NoSuchUpload':
+                errors[object_key] = code
+    return errors
+
+
+class MultipartUploadView(APIView):
+    throttle_scope = 'upload'
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, object_key):
+        if not object_key:
+            return None, Response({"error": "Object key not provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = MultipartUpload.objects.select_related(
+                'app_object').get(app_object_id=object_key)
+        except MultipartUpload.DoesNotExist:
+            return None, Response({"error": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if upload.app_object.owner_id != request.user.id:
+            return None, Response({"error": "You do not have permission to access this object."}, status=status.HTTP_403_FORBIDDEN)
+
+        return upload, None
+
+    def upload_state(self, upload, parts):
+        return {
+            "object_key": upload.app_object_id,
+            "part_size": upload.part_size,
+            "part_count": upload.part_count,
+            "max_concurrency": settings.OBJECT_MULTIPART_MAX_CONCURRENCY,
+            "uploaded_bytes": sum(part.size for part in parts),
+            "parts": [{"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                      for part in parts],
+        }
+
+
+class InitiateMultipartUploadView(MultipartUploadView):
+
+    def post(self, request):
+        serializer = PresignedUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        name = serializer.validated_data['name']
+        size = serializer.validated_data['size']
+        mime_type, file_type = detect_file_type(name)
+
+        # S3 allows at most 10000 parts, so very large files get bigger parts
+        part_size = max(settings.OBJECT_MULTIPART_PART_SIZE,
+                        math.ceil(size / 10000))
+        part_count = max(1, math.ceil(size / part_size))
+
+        try:
+            reserve(request.user.id, [(file_type, size)])
+        except QuotaExceeded:
+            return Response({"error": "Storage quota exceeded."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        object_key = str(uuid4())
+        try:
+            result = get_s3_client().create_multipart_upload(
+                ACL='private',
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=object_key,
+                ContentType=mime_type
+            )
+
+            with transaction.atomic():
+                app_object = AppObject.objects.create(object_key=object_key,
+                                                      name=name,
+                                                      owner=request.user,
+                                                      size=size,
+                                                      mime_type=mime_type,
+                                                      file_type=file_type,
+                                                      status=AppObject.Status.PENDING
+                                                      )
+                upload = MultipartUpload.objects.create(app_object=app_object,
+                                                        upload_id=result['UploadId'],
+                                                        part_size=part_size,
+                                                        part_count=part_count
+                                                        )
+        except Exception as e:
+            # The reservation committed before the S3 call, and without the
+            # rows nothing would ever release it
+            release([(request.user.id, file_type, size)])
+            if isinstance(e, ClientError):
+                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            raise
+
+        return Response(self.upload_state(upload, []), status=status.HTTP_201_CREATED)
+
+
+class MultipartUploadPartsView(MultipartUploadView):
+
+    def get(self, request):
+        """Lists the parts received so far, so a client can resume."""
+        upload, error = self.get_upload(
+            request, request.query_params.get('object_key'))
+        if error:
+            return error
+
+        try:
+            parts = sync_multipart_parts(get_s3_client(), upload)
+        except ClientError as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(self.upload_state(upload, parts), status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """Returns presigned PUT URLs the client uploads the given parts to."""
+        serializer = MultipartPartUrlsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload, error = self.get_upload(
+            request, serializer.validated_data['object_key'])
+        if error:
+            return error
+
+        part_numbers = serializer.validated_data['part_numbers']
+        if max(part_numbers) > upload.part_count:
+            return Response({"error": "Part number out of range."}, status=status.HTTP_400_BAD_REQUEST)
+
+        s3_client = get_s3_client()
+        expires_in = settings.OBJECT_PRESIGNED_URL_EXPIRY
+        urls = {
+            part_number: s3_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': settings.ARVAN_BUCKET_NAME,
+                    'Key': upload.app_object_id,
+                    'UploadId': upload.upload_id,
+                    'PartNumber': part_number,
+                },
+                ExpiresIn=expires_in
+            )
+            for part_number in part_numbers
+        }
+
+        return Response({"urls": urls, "expires_in": expires_in}, status=status.HTTP_200_OK)
+
+
+class CompleteMultipartUploadView(MultipartUploadView):
+
+    def post(self, request):
+        upload, error = self.get_upload(request, request.data.get('object_key'))
+        if error:
+            return error
+
+        s3_client = get_s3_client()
+        try:
+            parts = sync_multipart_parts(s3_client, upload)
+            missing = set(range(1, upload.part_count + 1)) - \
+                {part.part_number for part in parts}
+            if missing:
+                return Response({"error": "Upload is missing parts.", "missing_parts": sorted(missing)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            # Presigned part URLs carry no size limit, and only the declared
+            # size was reserved against the quota. Parts can be uploaded
+            # again, so the upload stays open for the client to fix.
+            if sum(part.size for part in parts) > upload.app_object.size:
+                return Response({"error": "Uploaded parts exceed the declared size."},
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            s3_client.complete_multipart_upload(
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=upload.app_object_id,
+                UploadId=upload.upload_id,
+                MultipartUpload={'Parts': [{'ETag': part.etag, 'PartNumber': part.part_number}
+                                           for part in parts]}
             )
+        except ClientError as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        app_object = upload.app_object
+        size = sum(part.size for part in parts)
+        with transaction.atomic():
+            completed = complete_pending_upload(app_object, size)
+            if completed:
+                upload.delete()
+        if not completed:
+            # A concurrent completion won, or the upload was aborted meanwhile
+            app_object = AppObject.objects.filter(object_key=app_object.object_key).first()
+            if app_object is None:
+                return Response({"error": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = AppObjectSerializer(app_object, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AbortMultipartUploadView(MultipartUploadView):
+
+    def post(self, request):
+        upload, error = self.get_upload(request, request.data.get('object_key'))
+        if error:
+            return error
 
+        try:
+            get_s3_client().abort_multipart_upload(
+                Bucket=settings.ARVAN_BUCKET_NAME,
+                Key=upload.app_object_id,
+                UploadId=upload.upload_id
+            )
         except ClientError as e:
-            raise e
+            if e.response['Error']['Code'] != 'NoSuchUpload':
+                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({"message": "Object uploaded successfully."}, status=status.HTTP_201_CREATED)
+        app_object = upload.app_object
+        with transaction.atomic():
+            app_object.delete()
+            release([(app_object.owner_id, app_object.file_type, app_object.size)])
+        return Response({"message": "Upload aborted."}, status=status.HTTP_200_OK)
 
 
 class DownloadObjectView(APIView):
+    throttle_scope = 'download'
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -104,55 +650,202 @@ class DownloadObjectView(APIView):
 
         try:
             # Fetch the object from the database
-            app_object = AppObject.objects.get(object_key=object_key)
+            app_object = AppObject.objects.select_related('blob').get(
+                object_key=object_key, status=AppObject.Status.AVAILABLE)
         except AppObject.DoesNotExist:
             return Response({"error": "Object not found in the database."}, status=status.HTTP_404_NOT_FOUND)
 
         # Check if the user has access to the object
-        if request.user != app_object.owner and request.user not in app_object.shared_with.all():
+        if not can_read(request.user, app_object):
             return Response({"error": "You do not have permission to access this object."}, status=status.HTTP_403_FORBIDDEN)
 
-        s3_resource = get_s3_resource()
+        download_mode = settings.OBJECT_DOWNLOAD_MODE
+        if download_mode in ('presigned', 'redirect'):
+            return self.presigned_response(app_object, redirect=download_mode == 'redirect')
+        return self.stream_response(request, app_object)
+
+    def stream_response(self, request, app_object):
+        # Stored bytes never change under a key, so the key is a strong
+        # validator and revalidating a cached copy needs no S3 round trip.
+        etag = quote_etag(app_object.object_key)
+        last_modified = int(app_object.uploaded_at.timestamp())
+        content_type = get_content_type(app_object)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            ranges = None
+            if if_range_passes(request.headers.get('If-Range'), etag, last_modified):
+                ranges = parse_range_header(
+                    request.headers.get('Range'), app_object.size)
+
+            try:
+                if ranges == []:
+                    response = Response({"error": "Requested range not satisfiable."},
+                                        status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                    response['Content-Range'] = f'bytes */{app_object.size}'
+                elif ranges is None:
+                    response = self.full_response(app_object, content_type)
+                elif len(ranges) == 1:
+                    response = self.single_range_response(
+                        app_object, content_type, *ranges[0])
+                else:
+                    response = self.multi_range_response(
+                        app_object, content_type, ranges)
+
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'InvalidRange':
+                    return Response({"error": "Requested range not satisfiable."},
+                                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                logger.error("Failed to download %s: %s", app_object.object_key, e)
+                return Response({"error": "Failed to download object."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private'
+        if response.status_code != status.HTTP_304_NOT_MODIFIED:
+            response['Content-Disposition'] = content_disposition_header(
+                True, app_object.name)
+        return response
+
+    def open_object(self, app_object, start=None, end=None):
+        kwargs = {'Bucket': settings.ARVAN_BUCKET_NAME, 'Key': app_object.storage_key}
+        if start is not None:
+            kwargs['Range'] = f'bytes={start}-{end}'
+        return get_s3_client().get_object(**kwargs)
+
+    def full_response(self, app_object, content_type):
+        s3_object = self.open_object(app_object)
+
+        # Pipe the object body to the client chunk by chunk, so nothing
+        # touches the disk and memory stays at one chunk per request.
+        response = StreamingHttpResponse(
+            iter_s3_body(s3_object['Body'],
+                         settings.OBJECT_DOWNLOAD_CHUNK_SIZE),
+            content_type=content_type)
+        response['Content-Length'] = s3_object['ContentLength']
+        return response
+
+    def single_range_response(self, app_object, content_type, start, end):
+        s3_object = self.open_object(app_object, start, end)
+
+        response = StreamingHttpResponse(
+            iter_s3_body(s3_object['Body'],
+                         settings.OBJECT_DOWNLOAD_CHUNK_SIZE),
+            content_type=content_type, status=status.HTTP_206_PARTIAL_CONTENT)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{app_object.size}'
+        return response
+
+    def multi_range_response(self, app_object, content_type, ranges):
+        def open_range(start, end):
+            s3_object = self.open_object(app_object, start, end)
+            return iter_s3_body(s3_object['Body'], settings.OBJECT_DOWNLOAD_CHUNK_SIZE)
+
+        body = MultipartByteranges(
+            ranges, app_object.size, content_type, open_range)
+        response = StreamingHttpResponse(
+            body, content_type=body.response_content_type, status=status.HTTP_206_PARTIAL_CONTENT)
+        response['Content-Length'] = len(body)
+        return response
+
+    def presigned_response(self, app_object, redirect=False):
+        # The client fetches the bytes from the storage directly; S3 sets the
+        # filename and MIME type on the response from the signed parameters.
+        expires_in = settings.OBJECT_PRESIGNED_URL_EXPIRY
+        url = get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': settings.ARVAN_BUCKET_NAME,
+                'Key': app_object.storage_key,
+                'ResponseContentDisposition': content_disposition_header(True, app_object.name),
+                'ResponseContentType': get_content_type(app_object),
+            },
+            ExpiresIn=expires_in
+        )
+
+        if redirect:
+            return HttpResponseRedirect(url)
+        return Response({"url": url, "expires_in": expires_in}, status=status.HTTP_200_OK)
+
+
+class ObjectPreviewView(APIView):
+    """
+    A small rendition of an image or of a PDF's first page, ``size`` pixels
+    on its longer edge. Renditions never change under their key, so clients
+    cache them and revalidate against the ETag without an S3 round trip.
+    """
+    throttle_scope = 'download'
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        object_key = request.query_params.get('object_key')
+
+        if not object_key:
+            return Response({"error": "Object key not provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        sizes = settings.OBJECT_RENDITION_SIZES
         try:
-            # Temporary file path to store the downloaded object
-            temp_file = tempfile.NamedTemporaryFile(delete=False)
-            download_path = app_object.name
+            size = int(request.query_params.get('size', min(sizes)))
+        except ValueError:
+            size = None
+        if size not in sizes:
+            return Response({"error": "Invalid preview size."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Download the file from the S3 bucket
-            bucket = s3_resource.Bucket('djangowebstorage')
-            bucket.download_file(object_key, download_path)
+        try:
+            app_object = AppObject.objects.only('object_key', 'owner_id').get(
+                object_key=object_key, status=AppObject.Status.AVAILABLE)
+        except AppObject.DoesNotExist:
+            return Response({"error": "Object not found in the database."}, status=status.HTTP_404_NOT_FOUND)
 
-            # Return the file as a response
-            temp_file.seek(0)
-            response = FileResponse(open(
-                download_path, 'rb'), as_attachment=True, filename=os.path.basename(app_object.name))
+        if not can_read(request.user, app_object):
+            return Response({"error": "You do not have permission to access this object."}, status=status.HTTP_403_FORBIDDEN)
 
-            # Cleanup the temporary file
-            os.remove(download_path)
-            return response
+        rendition = Rendition.objects.filter(
+            app_object=app_object, size=size, status=Rendition.Status.READY).first()
+        if rendition is None:
+            return Response({"error": "Preview not available."}, status=status.HTTP_404_NOT_FOUND)
 
-        except ClientError as e:
-            print(e)
-            return Response({"error": "Failed to download object."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            print(e)
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        etag = quote_etag(rendition.storage_key)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                s3_object = get_s3_client().get_object(
+                    Bucket=settings.ARVAN_BUCKET_NAME, Key=rendition.storage_key)
+            except ClientError:
+                return Response({"error": "Failed to download object."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            response = StreamingHttpResponse(
+                iter_s3_body(s3_object['Body'], settings.OBJECT_DOWNLOAD_CHUNK_SIZE),
+                content_type=rendition.content_type)
+            response['Content-Length'] = s3_object['ContentLength']
 
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={settings.OBJECT_PREVIEW_MAX_AGE}'
+        return response
 
-class ObjectListView(generics.ListAPIView):
-    class ObjectListPagination(PageNumberPagination):
-        page_size = 2
-        page_size_query_param = 'page_size'
 
+class ObjectListView(generics.ListAPIView):
+    """
+    Owned and shared objects, optionally filtered by file type, MIME type
+    prefix, size and upload time, and ordered by upload time, name or size.
+    """
     serializer_class = AppObjectSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = ObjectListPagination
+    pagination_class = VisibleObjectsPagination
 
     def get_queryset(self):
-        user = self.request.user
-        owned_objects = AppObject.objects.filter(owner=user)
-        shared_objects = AppObject.objects.filter(shared_with=user)
-        return (owned_objects | shared_objects).distinct().order_by('-uploaded_at')
+        filters = ObjectListFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return VisibleObjects(self.request.user, filters.to_filters())
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # shared_with is rendered as ids, so one query for the whole page
+        # that loads only user ids is enough.
+        prefetch_related_objects(
+            page, Prefetch('shared_with', queryset=User.objects.only('id')))
+        return page
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -160,6 +853,22 @@ class ObjectListView(generics.ListAPIView):
         return context
 
 
+class ObjectSearchView(ObjectListView):
+    """
+    Owned and shared objects with a word in their name starting with each
+    word of ``q``, case-insensitively, paged like the object list.
+    """
+    pagination_class = SearchPagination
+
+    def list(self, request, *args, **kwargs):
+        if not tokenize(request.query_params.get('q', '')):
+            return Response({"error": "Search query not provided."}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return NameSearch(self.request.user, self.request.query_params['q'])
+
+
 class DeleteObject(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -170,20 +879,35 @@ class DeleteObject(APIView):
             return Response({"error": "Object key not provided."}, status=status.HTTP_400_BAD_REQUEST)
     
 
-        s3_resource = get_s3_resource()
         try:
             app_object = AppObject.objects.get(object_key=object_key)
-            if app_object.owner != request.user:
+            if app_object.owner_id != request.user.id:
                 return Response({"error": "You do not have permission to access this object."}, status=status.HTTP_403_FORBIDDEN)
 
-            # Delete from the bucket
-            bucket_name = 'djangowebstorage'
-            bucket = s3_resource.Bucket(bucket_name)
-            s3_object = bucket.Object(object_key)
-            s3_object.delete()
+            s3_client = get_s3_client()
+            if app_object.status == AppObject.Status.PENDING:
+                # Deleting the row drops the upload id the parts are billed under
+                abort_errors = abort_multipart_uploads(s3_client, [object_key])
+                if abort_errors:
+                    return Response({"error": f"Storage error: {abort_errors[object_key]}."},
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            if app_object.blob_id is None:
+                # Delete from the bucket
+                s3_client.delete_object(
+                    Bucket=settings.ARVAN_BUCKET_NAME, Key=object_key)
 
-            # Delete from the database
-            app_object.delete()
+            # Delete from the database; deduplicated bytes go only with the
+            # last object referencing them
+            with transaction.atomic():
+                previews = rendition_keys([app_object.pk])
+                app_object.delete()
+                release([(app_object.owner_id, app_object.file_type, app_object.size)])
+                record_deletes([app_object])
+                release_blobs([app_object.blob_id])
+            if app_object.blob_id is not None:
+                purge_blobs(s3_client, [app_object.blob_id])
+            if previews:
+                delete_keys(s3_client, previews)
 
             return Response({"message": "Object deleted successfully."}, status=status.HTTP_200_OK)
 
@@ -193,13 +917,77 @@ class DeleteObject(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class BulkDeleteObjectsView(APIView):
+    """
+    Deletes many objects of the requesting user at once.
+
+    Ownership of every key is checked in one query, the objects are removed
+    from S3 with DeleteObjects batches and the rows with a single delete.
+    Each key gets an entry in ``results``; the response is a 207 when some of
+    them were not deleted.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        object_keys = list(dict.fromkeys(serializer.validated_data['object_keys']))
+
+        app_objects = {app_object.object_key: app_object for app_object in AppObject.objects.filter(
+            object_key__in=object_keys).only(
+                'object_key', 'owner_id', 'blob_id', 'file_type', 'mime_type', 'size', 'status')}
+        owners = {key: app_object.owner_id for key, app_object in app_objects.items()}
+        owned_keys = [key for key in object_keys if owners.get(key) == request.user.id]
+
+        # Objects without a blob own their S3 object; deduplicated ones only
+        # drop a reference, and unreferenced blobs are purged afterwards.
+        s3_client = get_s3_client()
+        # Open multipart uploads are aborted first, or their parts would
+        # stay stored once the rows holding their upload ids are gone
+        delete_errors = abort_multipart_uploads(
+            s3_client, [key for key in owned_keys if app_objects[key].status == AppObject.Status.PENDING])
+        delete_errors.update(delete_keys(
+            s3_client, [key for key in owned_keys
+                        if app_objects[key].blob_id is None and key not in delete_errors]))
+        deleted = [app_objects[key] for key in owned_keys if key not in delete_errors]
+        deleted_keys = [app_object.object_key for app_object in deleted]
+        with transaction.atomic():
+            previews = rendition_keys(deleted_keys)
+            AppObject.objects.filter(object_key__in=deleted_keys, owner=request.user).delete()
+            release((app_object.owner_id, app_object.file_type, app_object.size)
+                    for app_object in deleted)
+            record_deletes(deleted)
+            released = release_blobs(app_object.blob_id for app_object in deleted)
+        if released:
+            purge_blobs(s3_client, released)
+        if previews:
+            delete_keys(s3_client, previews)
+
+        results = []
+        for key in object_keys:
+            if key not in owners:
+                result = {"status": "failed", "error": "Object not found in the database."}
+            elif owners[key] != request.user.id:
+                result = {"status": "failed", "error": "You do not have permission to access this object."}
+            elif key in delete_errors:
+                result = {"status": "failed", "error": f"Storage error: {delete_errors[key]}."}
+            else:
+                result = {"status": "deleted"}
+            results.append({"object_key": key, **result})
+
+        response_status = status.HTTP_200_OK
+        if len(deleted_keys) < len(object_keys):
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
+
+
 class AccessUpdateView(generics.UpdateAPIView):
     serializer_class = AccessUpdateSerializer
     permission_classes = [IsAuthenticated]
 
     def check_object_permissions(self, request, obj):
         # Check if the user is the owner of the object
-        if not obj.owner == request.user:
+        if obj.owner_id != request.user.id:
             raise PermissionDenied(
                 "You do not have permission to modify this object's access.")
 
@@ -209,57 +997,180 @@ class AccessUpdateView(generics.UpdateAPIView):
         self.check_object_permissions(
             request, instance)  # Ensure user is owner
 
-        # Get the current set of users who have access
-        old_shared_users = set(instance.shared_with.all())
-
         serializer = self.get_serializer(instance, data=request.data)
 
         if serializer.is_valid():
-            # Update shared_with field
-            instance.shared_with.set(serializer.validated_data['shared_with'])
-            instance.save()
-
-            # Get the new set of users who have access
-            new_shared_users = set(instance.shared_with.all())
-            
-            # Determine newly added users
-            newly_added_users = new_shared_users - old_shared_users
-
-            # Send email to newly added users
-            for user in newly_added_users:
-                send_mail(
-                    'File Shared with You',
-                    'A file has been shared with you. Please check your account for access.',
-                    'liamirali.lotfi@gmail.com',
-                    [user.email],
-                )
+            shared_with = serializer.validated_data['shared_with']
+            old_shared_ids = set(instance.shares.values_list('user_id', flat=True))
+            new_shared_ids = {user.pk for user in shared_with}
+
+            # Diff by id and only touch the rows that changed
+            removed_ids = old_shared_ids - new_shared_ids
+            added_ids = new_shared_ids - old_shared_ids
+            instance.shares.filter(user_id__in=removed_ids).delete()
+            unindex_shares([instance.pk], removed_ids)
+            AppObjectShare.objects.bulk_create([
+                AppObjectShare(app_object=instance, user_id=user_id,
+                               **AppObjectShare.copies(instance))
+                for user_id in added_ids
+            ], ignore_conflicts=True)
+            index_shares((instance, user_id) for user_id in added_ids)
+            forget([instance.pk])
+
+            # Queue an email to newly added users
+            enqueue_mail(
+                'File Shared with You',
+                'A file has been shared with you. Please check your account for access.',
+                'liamirali.lotfi@gmail.com',
+                [user.email for user in shared_with if user.pk not in old_shared_ids],
+                dedupe_key=f'share:{instance.object_key}:{{email}}'
+            )
 
             return Response({"message": "Access updated successfully."}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UsersAccessView(APIView):
+class BulkAccessUpdateView(APIView):
+    """
+    Grants or revokes access to many objects for many users in one call.
+
+    Ownership of every key is checked in one query and the (object, user)
+    pairs are inserted or deleted with a single query on the through table.
+    Each newly granted user gets one email however many files they received.
+    """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    def post(self, request):
+        serializer = BulkAccessUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        object_keys = list(dict.fromkeys(serializer.validated_data['object_keys']))
+        user_ids = set(serializer.validated_data['user_ids'])
+        action = serializer.validated_data['action']
+
+        users = {user.pk: user for user in User.objects.filter(pk__in=user_ids).only('id', 'email')}
+        missing_ids = user_ids - users.keys()
+        if missing_ids:
+            return Response({"error": f"Users not found: {sorted(missing_ids)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # Owners always have access to their own objects
+        users.pop(request.user.id, None)
+
+        app_objects = AppObject.objects.filter(object_key__in=object_keys).only(
+            'object_key', 'owner_id', 'uploaded_at', 'name', 'size', 'file_type', 'status')
+        owners = {app_object.object_key: app_object for app_object in app_objects}
+        owned = {key: owners[key] for key in object_keys
+                 if key in owners and owners[key].owner_id == request.user.id}
+
+        if action == 'grant':
+            existing = set(AppObjectShare.objects.filter(
+                app_object_id__in=owned, user_id__in=users).values_list('app_object_id', 'user_id'))
+            new_shares = [
+                AppObjectShare(app_object=app_object, user_id=user_id,
+                               **AppObjectShare.copies(app_object))
+                for app_object in owned.values() for user_id in users
+                if (app_object.pk, user_id) not in existing
+            ]
+            AppObjectShare.objects.bulk_create(new_shares, ignore_conflicts=True)
+            index_shares((share.app_object, share.user_id) for share in new_shares)
+
+            granted_counts = Counter(share.user_id for share in new_shares)
+            enqueue_mails(
+                OutgoingEmail(subject='Files Shared with You',
+                              body=f'{count} file(s) have been shared with you. '
+                                   'Please check your account for access.',
+                              from_email='liamirali.lotfi@gmail.com',
+                              to=users[user_id].email)
+                for user_id, count in granted_counts.items()
+            )
+        else:
+            AppObjectShare.objects.filter(app_object_id__in=owned, user_id__in=users).delete()
+            unindex_shares(owned, users)
+        forget(owned)
+
+        results = []
+        for key in object_keys:
+            if key not in owners:
+                result = {"status": "failed", "error": "Object not found in the database."}
+            elif key not in owned:
+                result = {"status": "failed", "error": "You do not have permission to access this object."}
+            else:
+                result = {"status": "granted" if action == 'grant' else "revoked"}
+            results.append({"object_key": key, **result})
+
+        response_status = status.HTTP_200_OK
+        if len(owned) < len(object_keys):
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
+
+
+class UsersAccessView(generics.ListAPIView):
+    class UsersAccessPagination(PageNumberPagination):
+        page_size = 20
+        page_size_query_param = 'page_size'
+        max_page_size = 100
+
+    throttle_scope = 'people'
+    serializer_class = UserAccessSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = UsersAccessPagination
+
+    def list(self, request, *args, **kwargs):
         object_key = request.query_params.get('object_key')
 
         if not object_key:
             return Response({"error": "Object key not provided."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            app_object = AppObject.objects.get(object_key=object_key)
+            self.app_object = AppObject.objects.only(
+                'object_key', 'owner_id').get(object_key=object_key)
         except AppObject.DoesNotExist:
             return Response({"error": "Object not found in the database."}, status=status.HTTP_404_NOT_FOUND)
 
-        users = User.objects.all()
-        response_data = []
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        has_access = AppObjectShare.objects.filter(
+            app_object_id=self.app_object.object_key, user=OuterRef('pk'))
+        users = User.objects.alias(
+            username_lower=Lower('username'),
+            email_lower=Lower('email'),
+        ).annotate(
+            has_access=Exists(has_access),
+            is_owner=ExpressionWrapper(
+                Q(pk=self.app_object.owner_id), output_field=BooleanField()),
+        ).only('id', 'first_name', 'last_name', 'username', 'email')
+
+        # A range on the lowered column (rather than LIKE) can use the
+        # functional indexes on every database backend.
+        query = self.request.query_params.get('q', '').strip().lower()
+        if query:
+            users = users.filter(
+                Q(username_lower__gte=query, username_lower__lt=query + '\U0010ffff') |
+                Q(email_lower__gte=query, email_lower__lt=query + '\U0010ffff'))
 
-        for user in users:
-            user_data = UserSerializer(user).data
-            user_data['has_access'] = user in app_object.shared_with.all()
-            user_data['is_owner'] = user == app_object.owner
-            response_data.append(user_data)
+        return users.order_by('username_lower', 'id')
+
+
+class StatsView(APIView):
+    """
+    Storage statistics of the requesting user, plus system-wide ones for
+    staff, read from the rollup tables instead of aggregating objects.
+    """
+    permission_classes = [IsAuthenticated]
+    default_days = 30
+    max_days = 366
+    largest_count = 10
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            return Response({"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(1, min(days, self.max_days))
+        since = timezone.localdate() - timedelta(days=days - 1)
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        data = {"user": summarize(request.user.id, since, self.largest_count)}
+        if request.user.is_staff:
+            data["system"] = summarize(None, since, self.largest_count)
+        return Response(data, status=status.HTTP_200_OK)
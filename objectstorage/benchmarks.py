@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test.utils import override_settings
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(**overrides):
+    """
+    Runs the block in a transaction that is rolled back afterwards, so
+    benchmark fixtures never outlive the measurement, with ``overrides``
+    applied to the settings meanwhile.
+    """
+    try:
+        with transaction.atomic(), override_settings(**overrides):
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def create_users(prefix, count, start=0, batch_size=5000, **fields):
+    """
+    Inserts users ``{prefix}{i}`` (email ``{prefix}{i}@example.com``) for
+    ``i`` in ``[start, start + count)`` and yields them batch by batch.
+    bulk_create skips the signup signals, so no verification mail is queued.
+    """
+    User = get_user_model()
+    for batch_start in range(start, start + count, batch_size):
+        batch = range(batch_start, min(batch_start + batch_size, start + count))
+        yield User.objects.bulk_create(
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', **fields)
+            for i in batch)
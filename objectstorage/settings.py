@@ -52,7 +52,8 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'api',
     'user',
-    'objects'
+    'objects',
+    'outbox',
 ]
 
 MIDDLEWARE = [
@@ -64,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.throttling.ByteThrottleMiddleware',
 ]
 
 AUTHENTICATION_BACKENDS = (
@@ -144,8 +146,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Rest Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.TokenBucketThrottle',
+        'api.throttling.ByteRateThrottle',
+    ),
+    # Reverse proxies in front of the app. Anonymous clients are told apart
+    # by REMOTE_ADDR unless this is set; X-Forwarded-For is client-supplied
+    # and only trusted for the addresses these proxies append.
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=0),
+}
+
+# Throttling: token buckets per user, or client address when anonymous, and
+# per endpoint class (a view's throttle_scope, 'api' by default). Limits
+# are (per second, burst) pairs; scopes left out are not limited. The local
+# backend keeps buckets per process, the cache one shares them in CACHES.
+API_THROTTLE_BACKEND = env('API_THROTTLE_BACKEND', default='api.throttling.LocalBucketStore')
+API_THROTTLE_LOCAL_MAX_BUCKETS = env.int('API_THROTTLE_LOCAL_MAX_BUCKETS', default=100000)
+API_THROTTLE_RATES = {
+    'api': (20, 200),
+    'upload': (5, 50),
+    'download': (20, 200),
+    'login': (1, 20),
+    'people': (5, 50),
+}
+API_THROTTLE_BYTE_RATES = {
+    'upload': (50 * 1024 ** 2, 1024 ** 3),
+    'download': (100 * 1024 ** 2, 2 * 1024 ** 3),
 }
 
 # Custom User Model
@@ -159,6 +187,25 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 
+# Email outbox: requests only queue messages; `manage.py send_outbox --loop`
+# delivers them, retrying failures with exponential backoff.
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=8)
+OUTBOX_RETRY_BACKOFF = env.int('OUTBOX_RETRY_BACKOFF', default=60)
+OUTBOX_LEASE_SECONDS = env.int('OUTBOX_LEASE_SECONDS', default=300)
+OUTBOX_POLL_INTERVAL = env.float('OUTBOX_POLL_INTERVAL', default=5)
+
+# Cache, e.g. redis://host:6379/0 to share it between processes. Without a
+# shared cache each process forgets its own cached access decisions only,
+# so a revoked share can be honoured elsewhere for OBJECT_ACCESS_CACHE_TTL.
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://?MAX_ENTRIES=10000')}
+OBJECT_ACCESS_CACHE_TTL = env.int('OBJECT_ACCESS_CACHE_TTL', default=60)
+# Seconds an authenticated user is served from the cache without a query.
+# Saves and deletes drop the cached user in this process only, so without a
+# shared cache a deactivated user, or one whose password changed, is still
+# authenticated by other workers for up to this long (check --deploy warns).
+USER_CACHE_TTL = env.int('USER_CACHE_TTL', default=60)
+
 # Site domain
 SITE_DOMAIN = env('SITE_DOMAIN')
 
@@ -166,6 +213,69 @@ SITE_DOMAIN = env('SITE_DOMAIN')
 ARVAN_ACCESS_KEY = env('ARVAN_ACCESS_KEY')
 ARVAN_SECRET_KEY = env('ARVAN_SECRET_KEY')
 ARVAN_ENDPOINT = env('ARVAN_ENDPOINT')
+ARVAN_BUCKET_NAME = env('ARVAN_BUCKET_NAME', default='djangowebstorage')
+
+# Shared S3 client connection pool
+ARVAN_MAX_POOL_CONNECTIONS = env.int('ARVAN_MAX_POOL_CONNECTIONS', default=50)
+ARVAN_CONNECT_TIMEOUT = env.float('ARVAN_CONNECT_TIMEOUT', default=5)
+ARVAN_READ_TIMEOUT = env.float('ARVAN_READ_TIMEOUT', default=60)
+ARVAN_MAX_ATTEMPTS = env.int('ARVAN_MAX_ATTEMPTS', default=3)
+
+# Direct-to-S3 uploads that are not completed within this many seconds are
+# removed by the expire_pending_uploads command.
+OBJECT_PENDING_UPLOAD_TTL = env.int('OBJECT_PENDING_UPLOAD_TTL', default=24 * 60 * 60)
+
+# Multipart uploads. S3 requires every part but the last to be at least
+# 5 MiB; the concurrency is a hint returned to clients.
+OBJECT_MULTIPART_PART_SIZE = env.int(
+    'OBJECT_MULTIPART_PART_SIZE', default=8 * 1024 * 1024)
+OBJECT_MULTIPART_MAX_CONCURRENCY = env.int(
+    'OBJECT_MULTIPART_MAX_CONCURRENCY', default=4)
+
+# Storage quota of users without one of their own, in bytes
+OBJECT_STORAGE_QUOTA = env.int('OBJECT_STORAGE_QUOTA', default=10 * 1024 ** 3)
+
+# Batch uploads. Files are pushed to S3 through a thread pool of this size,
+# which should stay below ARVAN_MAX_POOL_CONNECTIONS.
+OBJECT_BATCH_UPLOAD_CONCURRENCY = env.int(
+    'OBJECT_BATCH_UPLOAD_CONCURRENCY', default=16)
+DATA_UPLOAD_MAX_NUMBER_FILES = env.int(
+    'DATA_UPLOAD_MAX_NUMBER_FILES', default=1000)
+
+# Bulk sharing builds one share row per object and user pair in a single
+# transaction, so a request may grant or revoke at most this many pairs.
+OBJECT_BULK_ACCESS_MAX_PAIRS = env.int('OBJECT_BULK_ACCESS_MAX_PAIRS', default=10000)
+
+# Object listing. Counting every visible object is the most expensive part
+# of a page; clients can skip it with ?count=false.
+OBJECT_LIST_PAGE_SIZE = env.int('OBJECT_LIST_PAGE_SIZE', default=25)
+OBJECT_LIST_MAX_PAGE_SIZE = env.int('OBJECT_LIST_MAX_PAGE_SIZE', default=100)
+OBJECT_LIST_INCLUDE_COUNT = env.bool('OBJECT_LIST_INCLUDE_COUNT', default=True)
+
+# Object downloads
+# 'stream' pipes the bytes through Django, 'presigned' returns a short-lived
+# URL to the object and 'redirect' answers with a 302 to that URL.
+OBJECT_DOWNLOAD_MODE = env('OBJECT_DOWNLOAD_MODE', default='stream')
+OBJECT_PRESIGNED_URL_EXPIRY = env.int(
+    'OBJECT_PRESIGNED_URL_EXPIRY', default=300)
+OBJECT_DOWNLOAD_CHUNK_SIZE = env.int(
+    'OBJECT_DOWNLOAD_CHUNK_SIZE', default=64 * 1024)
+
+# Previews. Images and the first page of PDFs are scaled down to fit each
+# size, in pixels, by `manage.py process_renditions --loop`, which needs
+# Pillow, and PyMuPDF for PDFs. Larger originals are not previewed.
+OBJECT_RENDITION_SIZES = env.list('OBJECT_RENDITION_SIZES', cast=int, default=[128, 512])
+OBJECT_RENDITION_FORMAT = env('OBJECT_RENDITION_FORMAT', default='webp')
+OBJECT_RENDITION_QUALITY = env.int('OBJECT_RENDITION_QUALITY', default=80)
+OBJECT_RENDITION_MAX_SOURCE_SIZE = env.int(
+    'OBJECT_RENDITION_MAX_SOURCE_SIZE', default=50 * 1024 * 1024)
+OBJECT_RENDITION_WORKERS = env.int('OBJECT_RENDITION_WORKERS', default=2)
+OBJECT_RENDITION_BATCH_SIZE = env.int('OBJECT_RENDITION_BATCH_SIZE', default=32)
+OBJECT_RENDITION_MAX_ATTEMPTS = env.int('OBJECT_RENDITION_MAX_ATTEMPTS', default=3)
+OBJECT_RENDITION_RETRY_BACKOFF = env.int('OBJECT_RENDITION_RETRY_BACKOFF', default=60)
+OBJECT_RENDITION_LEASE_SECONDS = env.int('OBJECT_RENDITION_LEASE_SECONDS', default=600)
+OBJECT_RENDITION_POLL_INTERVAL = env.float('OBJECT_RENDITION_POLL_INTERVAL', default=5)
+OBJECT_PREVIEW_MAX_AGE = env.int('OBJECT_PREVIEW_MAX_AGE', default=24 * 60 * 60)
 
 
 # CORS
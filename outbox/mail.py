@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_mail(subject, message, from_email, recipient_list, html_message='', dedupe_key=None):
+    """
+    Queues one message per recipient; the send_outbox worker delivers them.
+
+    ``dedupe_key`` may contain ``{email}``, which is filled in per recipient.
+    """
+    enqueue_mails(
+        OutgoingEmail(subject=subject,
+                      body=message,
+                      html_body=html_message,
+                      from_email=from_email,
+                      to=recipient,
+                      dedupe_key=dedupe_key and dedupe_key.format(email=recipient))
+        for recipient in recipient_list
+    )
+
+
+def enqueue_mails(messages):
+    """Inserts unsaved ``OutgoingEmail`` rows, skipping pending duplicates."""
+    OutgoingEmail.objects.bulk_create(messages, ignore_conflicts=True)
+
+
+def claim_batch(batch_size):
+    """
+    Leases up to ``batch_size`` due messages to this worker.
+
+    Pushing ``next_attempt_at`` past the lease keeps other workers off these
+    rows while they are sent outside the transaction. Each lease is an
+    UPDATE conditional on the ``next_attempt_at`` that was read, so a row
+    another worker leased first is left to it; on SQLite, where
+    ``select_for_update`` does nothing, that is what keeps two workers from
+    sending the same message.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        due = OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+            status=OutgoingEmail.Status.PENDING, next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')[:batch_size]
+        batch = [message for message in due if OutgoingEmail.objects.filter(
+            pk=message.pk, status=OutgoingEmail.Status.PENDING,
+            next_attempt_at=message.next_attempt_at).update(next_attempt_at=lease)]
+    return batch
+
+
+def mark_failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutgoingEmail.Status.FAILED
+    else:
+        backoff = settings.OUTBOX_RETRY_BACKOFF * 2 ** (message.attempts - 1)
+        message.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+
+
+def send_batch(batch):
+    """Sends ``batch`` over a single SMTP connection and records the outcome."""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # The server is unreachable: every message waits for the next try
+        for message in batch:
+            mark_failed(message, e)
+    else:
+        try:
+            for message in batch:
+                email = EmailMultiAlternatives(message.subject, message.body, message.from_email,
+                                               [message.to], connection=connection)
+                if message.html_body:
+                    email.attach_alternative(message.html_body, 'text/html')
+                try:
+                    email.send()
+                except Exception as e:
+                    mark_failed(message, e)
+                else:
+                    message.status = OutgoingEmail.Status.SENT
+                    message.sent_at = timezone.now()
+                    message.attempts += 1
+        finally:
+            connection.close()
+
+    OutgoingEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+
+def process_outbox(batch_size=None):
+    """Delivers due messages until none are left; returns how many were sent."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    sent = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return sent
+        send_batch(batch)
+        sent += sum(message.status == OutgoingEmail.Status.SENT for message in batch)
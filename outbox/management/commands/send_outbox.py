@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.mail import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Sends queued emails, batching them over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling for new messages instead of exiting.")
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = process_outbox(options['batch_size'])
+            if sent:
+                self.stdout.write(f"Sent {sent} emails.")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .mail import claim_batch, enqueue_mail, process_outbox
+from .models import OutgoingEmail
+
+
+class OutboxTests(TestCase):
+
+    def test_enqueue_dedupes_pending_messages(self):
+        for _ in range(2):
+            enqueue_mail('Subject', 'Body', 'from@test.com', ['a@test.com', 'b@test.com'],
+                         dedupe_key='share:key:{email}')
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_process_outbox_sends_batch(self):
+        enqueue_mail('Subject', 'Body', 'from@test.com', ['a@test.com', 'b@test.com'],
+                     html_message='<p>Body</p>')
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.open') as mock_open:
+            self.assertEqual(process_outbox(), 2)
+        mock_open.assert_called_once_with()
+
+        self.assertEqual([message.to for message in mail.outbox], [['a@test.com'], ['b@test.com']])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.SENT).exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BACKOFF=60)
+    def test_process_outbox_retries_with_backoff(self):
+        enqueue_mail('Subject', 'Body', 'from@test.com', ['a@test.com'])
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                   side_effect=OSError('Connection refused')):
+            self.assertEqual(process_outbox(), 0)
+            message = OutgoingEmail.objects.get()
+            self.assertEqual(message.status, OutgoingEmail.Status.PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            process_outbox()
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutgoingEmail.Status.FAILED)
+            self.assertEqual(message.last_error, 'Connection refused')
+
+    def test_messages_leased_by_another_worker_are_skipped(self):
+        enqueue_mail('Subject', 'Body', 'from@test.com', ['a@test.com', 'b@test.com'])
+        stale = list(OutgoingEmail.objects.order_by('pk'))
+        # Another worker leases a message after this one has read it
+        OutgoingEmail.objects.filter(to='a@test.com').update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        with patch.object(OutgoingEmail.objects, 'select_for_update') as mock_select:
+            mock_select.return_value.filter.return_value.order_by.return_value.__getitem__.return_value = stale
+            batch = claim_batch(10)
+
+        self.assertEqual([message.to for message in batch], ['b@test.com'])
@@ -6,4 +6,5 @@ class UserConfig(AppConfig):
     name = 'user'
 
     def ready(self):
-        import user.receivers
\ No newline at end of file
+        import user.checks
+        import user.receivers
@@ -13,9 +13,9 @@ class EmailOrUsernameModelBackend(ModelBackend):
 
         try:
             if email is not None:
-                user = User.objects.get(email=email)
+                user = User.objects.filter_email(email).get()
             else:
-                user = User.objects.get(username__iexact=username)
+                user = User.objects.filter_username(username).get()
         except User.DoesNotExist:
             return
         if user.check_password(password) and self.user_can_authenticate(user):
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.security, deploy=True)
+def check_user_snapshot_cache(app_configs, **kwargs):
+    """
+    Warns when user snapshots live in a cache only one process can see: a
+    save or delete then drops the snapshot in that process alone, and a
+    deactivated user keeps authenticating elsewhere for USER_CACHE_TTL.
+    """
+    authentication_classes = settings.REST_FRAMEWORK.get('DEFAULT_AUTHENTICATION_CLASSES', ())
+    if 'user.authentication.CachedJWTAuthentication' not in authentication_classes:
+        return []
+    if settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    return [Warning(
+        "CachedJWTAuthentication caches users in a process-local cache.",
+        hint="Set CACHE_URL to a cache shared by every worker, or USER_CACHE_TTL=0.",
+        id='user.W001',
+    )]
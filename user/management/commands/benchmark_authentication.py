@@ -0,0 +1,55 @@
+import statistics
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from objectstorage.benchmarks import create_users, rolled_back
+from user.authentication import CachedJWTAuthentication, forget_user
+
+
+class Command(BaseCommand):
+    help = ("Compares the per-request cost of authenticating a JWT with the stock "
+            "JWTAuthentication and with CachedJWTAuthentication. The user is "
+            "created inside a transaction that is rolled back afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            results = self.measure(options['repeat'])
+
+        self.stdout.write(f"{'class':>24} {'median':>10} {'p99':>10} {'queries':>8}")
+        for name, (median, p99, queries) in results.items():
+            self.stdout.write(f"{name:>24} {median:>8.1f}us {p99:>8.1f}us {queries:>8.2f}")
+
+    def measure(self, repeat):
+        user, = next(create_users(f'bench{uuid4().hex[:8]}-', 1))
+        header = f'Bearer {AccessToken.for_user(user)}'
+        factory = APIRequestFactory()
+        forget_user(user.pk)
+
+        results = {}
+        for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+            samples = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(repeat):
+                    request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+                    start = time.perf_counter()
+                    authenticated, token = authentication.authenticate(request)
+                    samples.append((time.perf_counter() - start) * 1e6)
+                    assert authenticated.pk == user.pk
+            results[type(authentication).__name__] = (
+                statistics.median(samples),
+                statistics.quantiles(samples, n=100)[98],
+                len(queries) / repeat,
+            )
+        return results
@@ -0,0 +1,57 @@
+import statistics
+import time
+from uuid import uuid4
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from objectstorage.benchmarks import create_users, rolled_back
+from user.backends import EmailOrUsernameModelBackend
+from user.serializers import SignUpSerializer
+
+
+class Command(BaseCommand):
+    help = ("Measures login and signup latency as the user table grows. Users "
+            "are created inside a transaction that is rolled back afterwards; "
+            "a fast password hasher keeps hashing out of the numbers.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1000, 10000, 100000, 1000000],
+                            help="Number of users to measure at.")
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'users':>10} {'username':>12} {'email':>12} {'signup':>12}")
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        with rolled_back(PASSWORD_HASHERS=hashers):
+            self.measure(options)
+
+    def measure(self, options):
+        password = make_password('benchmark')
+        prefix = f'Bench{uuid4().hex[:8]}-'
+        backend = EmailOrUsernameModelBackend()
+        count = 0
+        for size in sorted(options['sizes']):
+            # The table only grows, so each size adds the missing users
+            for _ in create_users(prefix, size - count, start=count, password=password):
+                pass
+            count = max(count, size)
+
+            def timed(call):
+                samples = []
+                for i in range(options['repeat']):
+                    start = time.perf_counter()
+                    call(i)
+                    samples.append((time.perf_counter() - start) * 1000)
+                return statistics.median(samples)
+
+            # Logins use a different case than stored to exercise the lookup
+            username = timed(lambda i: backend.authenticate(
+                None, username=f'{prefix.lower()}{i * size // options["repeat"]}', password='benchmark'))
+            email = timed(lambda i: backend.authenticate(
+                None, email=f'{prefix.upper()}{i * size // options["repeat"]}@EXAMPLE.COM', password='benchmark'))
+            signup = timed(lambda i: SignUpSerializer(data={
+                'username': f'newuser{"x" * (i % 8)}', 'email': f'new{i}@example.com',
+                'password': 'Benchmark123#'}).is_valid())
+            self.stdout.write(f"{size:>10} {username:>10.2f}ms {email:>10.2f}ms {signup:>10.2f}ms")
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0003_alter_appuser_managers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appuser',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='appuser_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='appuser_email_lower_idx'),
+        ),
+    ]
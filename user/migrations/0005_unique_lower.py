@@ -0,0 +1,46 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicates(apps, schema_editor):
+    # Name the offending rows instead of failing on the constraint
+    AppUser = apps.get_model('user', 'AppUser')
+    for field in ('username', 'email'):
+        duplicates = list(AppUser.objects.values(lowered=Lower(field)).annotate(
+            count=Count('pk')).filter(count__gt=1).values_list('lowered', flat=True)[:10])
+        if duplicates:
+            raise RuntimeError(
+                f"Users differing only in the case of their {field} must be merged "
+                f"before this migration: {', '.join(duplicates)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0004_appuser_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='appuser',
+            name='appuser_username_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appuser',
+            name='appuser_email_lower_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='appuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='appuser_username_lower_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='appuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='appuser_email_lower_unique'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
-from django.db.models import Q
+from django.db.models import Value
 from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.utils.translation import gettext_lazy as _
 
 
@@ -23,9 +24,29 @@ class AppUserManager(BaseUserManager):
 
         return self.create_user(email, username, password, **extra_fields)
 
+    # Usernames and emails are unique regardless of case. Comparing the
+    # lowered column with a lowered value lets the database use the unique
+    # functional indexes, where __iexact would scan the table.
+    def filter_username(self, username):
+        return self.filter(Exact(Lower('username'), Lower(Value(username))))
+
+    def filter_email(self, email):
+        return self.filter(Exact(Lower('email'), Lower(Value(email))))
+
+    def get_by_natural_key(self, username):
+        return self.filter_username(username).get()
+
 
 class AppUser(AbstractUser):
     # Making email field unique
     email = models.EmailField(unique=True)
     is_email_verified = models.BooleanField(default=False)
     objects = AppUserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Case-insensitive uniqueness; the indexes also serve login,
+            # signup and the prefix search in the share dialog
+            models.UniqueConstraint(Lower('username'), name='appuser_username_lower_unique'),
+            models.UniqueConstraint(Lower('email'), name='appuser_email_lower_unique'),
+        ]
@@ -1,13 +1,15 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.core.mail import send_mail
 
 from django.conf import settings
 
+from outbox.mail import enqueue_mail
+
+from .authentication import forget_user
 from .tokens import email_verification_token
 
 User = get_user_model()
@@ -24,5 +26,15 @@ def send_verification_email(sender, instance, created, **kwargs):
             'uidb64': urlsafe_base64_encode(force_bytes(instance.pk)),
             'token': email_verification_token.make_token(instance),
         })
-        send_mail(subject=mail_subject, html_message=message, message=message,
-                  from_email="objectmanager@gmail.com", recipient_list=[instance.email])
+        # Queued rather than sent, so an SMTP outage cannot fail the signup
+        enqueue_mail(subject=mail_subject, html_message=message, message=message,
+                     from_email="objectmanager@gmail.com", recipient_list=[instance.email],
+                     dedupe_key=f'verify:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_snapshot(sender, instance, **kwargs):
+    # Covers deactivation and password changes; queryset updates bypass this
+    # and are only picked up once the snapshot expires.
+    forget_user(instance.pk)
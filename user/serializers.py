@@ -35,12 +35,18 @@ class SignUpSerializer(serializers.ModelSerializer):
         if not re.match("^[a-zA-Z]*$", value):
             raise serializers.ValidationError(
                 'Username must only contain alphabets.')
-        if User.objects.filter(username__iexact=value).exists():
+        if User.objects.filter_username(value).exists():
             raise serializers.ValidationError(
                 'A user with that username already exists.')
 
         return value
 
+    def validate_email(self, value):
+        if User.objects.filter_email(value).exists():
+            raise serializers.ValidationError(
+                'A user with that email already exists.')
+        return value
+
     def validate(self, attrs):
         self.validate_password(attrs.get('password'))
         self.validate_username(attrs.get('username'))
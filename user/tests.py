@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core import mail
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from django.urls import reverse
@@ -7,6 +9,15 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from outbox.models import OutgoingEmail
+
+from .authentication import CachedJWTAuthentication
+from .backends import EmailOrUsernameModelBackend
+from .checks import check_user_snapshot_cache
+
 User = get_user_model()
 
 class AppUserManagerTests(TestCase):
@@ -36,6 +47,27 @@ class AppUserManagerTests(TestCase):
         with self.assertRaises(IntegrityError):
             User.objects.create_user(email='testuser@example.com', username='testuser2', password='testpass2')
 
+class CaseInsensitiveLookupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='TestUser@Example.com', username='TestUser', password='testpass')
+        self.backend = EmailOrUsernameModelBackend()
+
+    def test_login_ignores_case(self):
+        self.assertEqual(self.backend.authenticate(None, username='testuser', password='testpass'), self.user)
+        self.assertEqual(self.backend.authenticate(None, email='TESTUSER@example.COM', password='testpass'), self.user)
+        self.assertIsNone(self.backend.authenticate(None, username='other', password='testpass'))
+
+    def test_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(email='other@example.com', username='TESTUSER', password='testpass')
+
+    def test_lookups_use_the_functional_indexes(self):
+        for users in (User.objects.filter_username('TestUser'), User.objects.filter_email('testuser@example.com')):
+            plan = users.explain()
+            self.assertNotIn('SCAN', plan)
+            self.assertIn('_lower_unique', plan)
+
+
 class AppUserTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(email='testuser@example.com', username='testuser', password='testpass')
@@ -56,3 +88,60 @@ class SignUpSerializerTests(APITestCase):
         response = self.client.post(self.url, self.valid_payload)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(User.objects.count(), 1)
+
+    def test_signup_rejects_case_variants(self):
+        User.objects.create_user(email='TestUser@Example.com', username='TestUser', password='testpass')
+        response = self.client.post(self.url, self.valid_payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'username', 'email'})
+
+    def test_signup_queues_verification_email(self):
+        self.client.post(self.url, self.valid_payload)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.get().to, 'testuser@example.com')
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', username='testuser', password='testpass')
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            user = self.authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.username, user.email), (self.user.pk, 'testuser', 'testuser@example.com'))
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertTrue(user.check_password('testpass'))
+
+    def test_saving_the_user_invalidates(self):
+        self.authentication.get_user(self.token)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.authentication.get_user(self.token).first_name, 'Renamed')
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_authenticates_api_requests(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
+        self.client.get(reverse('list-objects'))
+        with self.assertNumQueries(2):
+            # The two branches of the object list, and no user lookup
+            response = self.client.get(reverse('list-objects'), {'count': 'false'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deploy_check_warns_about_process_local_cache(self):
+        self.assertEqual([warning.id for warning in check_user_snapshot_cache(None)], ['user.W001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_user_snapshot_cache(None), [])
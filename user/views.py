@@ -11,6 +11,7 @@ from django.contrib.auth import get_user_model
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 
+from .authentication import get_user_snapshot
 from .serializers import SignUpSerializer, CustomTokenObtainPairSerializer
 from .tokens import email_verification_token
 
@@ -20,6 +21,7 @@ User = get_user_model()
 class SignUpUserView(generics.CreateAPIView):
     serializer_class = SignUpSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
 
 
 class ActivateUserView(views.APIView):
@@ -52,7 +54,10 @@ class CustomTokenVerifyView(TokenVerifyView):
             # Token is valid, retrieve user info
             token = UntypedToken(request.data['token'])
             user_id = token.payload.get('user_id')
-            user = User.objects.get(id=user_id)
+            # The cached snapshot the authentication class uses as well
+            user = get_user_snapshot(user_id)
+            if user is None:
+                return Response({'error': 'Token is invalid.'}, status=status.HTTP_401_UNAUTHORIZED)
 
             # Add user data to the response
             user_data = {
@@ -67,9 +72,7 @@ class CustomTokenVerifyView(TokenVerifyView):
         except TokenError as e:
             raise InvalidToken(e.args[0])
 
-        except User.DoesNotExist:
-            return Response({'error': 'Token is invalid.'}, status=status.HTTP_401_UNAUTHORIZED)
-
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'